@@ -1,5 +1,25 @@
-from agolutils.config.config import load_config as load_config
+import importlib
+
+# eager: `agolutils.convert` is also a submodule, which would shadow a lazy name.
 from agolutils.convert import convert as convert
-from agolutils.render.render import render_docx_template as render_docx_template
 
 __version__ = "0.3.2"
+
+# imported on first use so the cli (and `import agolutils`) don't pay for
+# docxtpl, docx and PIL until a report is rendered.
+_LAZY = {
+    "load_config": "agolutils.config.config",
+    "render_docx_template": "agolutils.render.render",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
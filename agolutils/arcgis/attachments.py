@@ -0,0 +1,217 @@
+import shutil
+import tempfile
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from agolutils import profiling
+from agolutils.cache.attachments import AttachmentCache
+
+
+@dataclass
+class AttachmentJob:
+    """One attachment to download from `layer` for the record `oid`.
+
+    The output file is `save_path / (filename_prefix + name)`, which is the same
+    name `download_attachment` produces.
+    """
+
+    layer: Any
+    oid: int
+    attachment_id: int
+    name: str
+    save_path: Union[str, Path] = "./"
+    filename_prefix: Optional[str] = None
+    size: Optional[int] = None
+    keywords: Optional[str] = None
+
+    @property
+    def cache_key(self) -> str:
+        props = self.layer.properties
+        return AttachmentCache.key(
+            props.get("serviceItemId") or getattr(self.layer, "url", None),
+            props.get("id"),
+            self.attachment_id,
+            self.size,
+            self.keywords,
+        )
+
+    @property
+    def host(self) -> str:
+        return urlparse(getattr(self.layer, "url", "") or "").netloc
+
+    @property
+    def filepath(self) -> Path:
+        return Path(self.save_path).resolve() / (
+            (self.filename_prefix or "") + self.name
+        )
+
+
+@dataclass
+class AttachmentResult:
+    job: AttachmentJob
+    filepath: Optional[Path] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class AttachmentListCache:
+    """Per-record attachment metadata, fetched with `get_list` at most once.
+
+    Share one instance across a fetch run so that every caller that needs the
+    attachment list for a record reuses the first response. Don't keep it
+    longer than that; attachments added later won't show up. Callers get
+    copies of the cached dicts, so they can annotate them freely.
+    """
+
+    def __init__(self):
+        self._lists: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(layer, oid: int) -> Tuple[str, int]:
+        return (getattr(layer, "url", None) or str(id(layer)), oid)
+
+    def get_list(self, layer, oid: int) -> List[Dict[str, Any]]:
+        key = self._key(layer, oid)
+        with self._lock:
+            attachments = self._lists.get(key)
+
+        if attachments is None:
+            with profiling.span("attachment_list"):
+                attachments = layer.attachments.get_list(oid=oid)
+            with self._lock:
+                attachments = self._lists.setdefault(key, attachments)
+
+        return [dict(att) for att in attachments]
+
+    def get(self, layer, oid: int, attachment_id: int) -> Dict[str, Any]:
+        for att in self.get_list(layer, oid):
+            if att["id"] == attachment_id:
+                return att
+        raise KeyError(f"no attachment {attachment_id} for objectid {oid}")
+
+    def clear(self):
+        with self._lock:
+            self._lists.clear()
+
+
+def attachment_jobs(
+    layer,
+    oid: int,
+    attachments: List[Dict[str, Any]],
+    save_path: Union[str, Path] = "./",
+    filename_prefix: Optional[str] = None,
+) -> List[AttachmentJob]:
+    """Build download jobs from attachment metadata as returned by `get_list`."""
+    return [
+        AttachmentJob(
+            layer=layer,
+            oid=oid,
+            attachment_id=att["id"],
+            name=att["name"],
+            save_path=save_path,
+            filename_prefix=filename_prefix,
+            size=att.get("size"),
+            keywords=att.get("keywords"),
+        )
+        for att in attachments
+    ]
+
+
+def download_job(job: AttachmentJob) -> Path:
+    """Download a single job, raising on failure."""
+    target = job.filepath
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    # download into a private directory first so that concurrent jobs which
+    # share an attachment name can't clobber each other before the rename.
+    tmpdir = Path(tempfile.mkdtemp(prefix=".download-", dir=target.parent))
+    try:
+        with profiling.span("download_attachment"):
+            job.layer.attachments.download(
+                oid=job.oid, attachment_id=job.attachment_id, save_path=str(tmpdir)
+            )
+        (tmpdir / job.name).replace(target)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    profiling.count("attachments_downloaded")
+    profiling.count("bytes_downloaded", target.stat().st_size)
+
+    return target
+
+
+def cached_download_job(job: AttachmentJob, cache: AttachmentCache) -> Path:
+    """Copy the job's file from `cache`, downloading and caching it on a miss."""
+    key = job.cache_key
+    target = cache.get(key, job.filepath)
+    if target is not None:
+        profiling.count("attachment_cache_hits")
+        return target
+
+    target = download_job(job)
+    cache.put(key, target)
+    return target
+
+
+def download_attachments(
+    jobs: Iterable[AttachmentJob],
+    max_workers: int = 1,
+    max_per_host: Optional[int] = None,
+    cache: Optional[AttachmentCache] = None,
+) -> List[AttachmentResult]:
+    """Download every job on a pool of `max_workers` threads.
+
+    At most `max_per_host` downloads run against any one server at a time.
+    A failed download is recorded on its result rather than raised, so one bad
+    file does not abort the batch. Results are returned in the order of `jobs`.
+
+    With a `cache`, attachments already in it are copied instead of downloaded;
+    the cache prunes itself to its size limit as files are added.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+
+    max_workers = max(1, min(max_workers, len(jobs)))
+    host_limits: Dict[str, threading.BoundedSemaphore] = {}
+    if max_per_host:
+        for host in {job.host for job in jobs}:
+            host_limits[host] = threading.BoundedSemaphore(max_per_host)
+
+    def fetch(job: AttachmentJob) -> Path:
+        if cache is None:
+            return download_job(job)
+        return cached_download_job(job, cache)
+
+    def run(job: AttachmentJob) -> AttachmentResult:
+        try:
+            with host_limits.get(job.host) or nullcontext():
+                return AttachmentResult(job, filepath=fetch(job))
+        except Exception as e:
+            return AttachmentResult(job, error=e)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(run, jobs))
+
+    return results
+
+
+def warn_failed_downloads(results: List[AttachmentResult]) -> List[AttachmentResult]:
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        warnings.warn(
+            f"failed to download attachment {r.job.attachment_id} "
+            f"({r.job.name}) for objectid {r.job.oid}: {r.error}",
+            stacklevel=2,
+        )
+    return failed
@@ -0,0 +1,85 @@
+import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+DATE_TYPES = {"esriFieldTypeDate"}
+INTEGER_TYPES = {
+    "esriFieldTypeOID",
+    "esriFieldTypeSmallInteger",
+    "esriFieldTypeInteger",
+    "esriFieldTypeBigInteger",
+}
+FLOAT_TYPES = {"esriFieldTypeSingle", "esriFieldTypeDouble"}
+
+
+def _is_null(value) -> bool:
+    # NaN is the only value that isn't equal to itself.
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def to_epoch_ms(value) -> Optional[int]:
+    """Normalize an AGOL date value to integer milliseconds since the epoch."""
+    if _is_null(value):
+        return None
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return int(value.timestamp() * 1000)
+    if isinstance(value, str):
+        try:
+            return int(float(value))
+        except ValueError:
+            return to_epoch_ms(datetime.datetime.fromisoformat(value))
+    return int(value)
+
+
+def to_int(value) -> Optional[int]:
+    return None if _is_null(value) else int(value)
+
+
+def to_float(value) -> Optional[float]:
+    return None if _is_null(value) else float(value)
+
+
+def field_converter(field: Dict[str, Any]) -> Optional[Callable[[Any], Any]]:
+    """The converter for a field's values, or None if they're used as is."""
+    ftype = field.get("type")
+    if ftype in DATE_TYPES:
+        return to_epoch_ms
+    if ftype in INTEGER_TYPES:
+        return to_int
+    if ftype in FLOAT_TYPES:
+        return to_float
+    return None
+
+
+class FieldDecoder:
+    """Decode raw feature attributes into context records using the layer schema.
+
+    This is the fast path for turning a query result into records: dates become
+    epoch milliseconds, as with the `q.sdf` -> `to_json` round trip, but without
+    building a DataFrame. Unlike that round trip, integer fields with nulls stay
+    integers and doubles keep their full precision. Every field in the schema is
+    present on each record, in schema order.
+    """
+
+    def __init__(self, fields: Iterable[Dict[str, Any]]):
+        self.converters = [(f["name"], field_converter(f)) for f in fields]
+        self._names = {name for name, _ in self.converters}
+
+    @classmethod
+    def for_layer(cls, layer) -> "FieldDecoder":
+        return cls(layer.properties.get("fields") or [])
+
+    def decode(self, attributes: Dict[str, Any]) -> Dict[str, Any]:
+        record = {}
+        for name, conv in self.converters:
+            value = attributes.get(name)
+            record[name] = value if conv is None or value is None else conv(value)
+
+        if attributes.keys() - self._names:
+            for key, value in attributes.items():
+                record.setdefault(key, value)
+        return record
+
+    def decode_features(self, features) -> List[Dict[str, Any]]:
+        return [self.decode(f.attributes) for f in features]
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+MISSING_NAME = "None"
+
+
+def domain_filter(x):
+    return (x.get("domain") is not None) and (
+        x.get("domain", {}).get("type", None) == "codedValue"
+    )
+
+
+class DomainIndex:
+    """`{code: name}` lookups for every coded-value field of a layer.
+
+    Built once per layer from its `__layer_properties` and reused for all of its
+    records, instead of rebuilding each mapping for every record. Codes without
+    a name map to `"None"`, as `remap_domains_as_name` always has.
+    """
+
+    def __init__(self, fields: List[Dict[str, Any]]):
+        self.lookups = {
+            f["name"]: {d["code"]: d["name"] for d in f["domain"]["codedValues"]}
+            for f in filter(domain_filter, fields)
+        }
+
+    @classmethod
+    def for_properties(cls, props: Optional[Dict[str, Any]]) -> "DomainIndex":
+        return domain_index(props)
+
+    def apply(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        for name, lookup in self.lookups.items():
+            record[name + "__as_name"] = lookup.get(record.get(name), MISSING_NAME)
+        return record
+
+    def apply_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add the `__as_name` columns to every record, one field at a time."""
+        for name, lookup in self.lookups.items():
+            column = name + "__as_name"
+            for record in records:
+                record[column] = lookup.get(record.get(name), MISSING_NAME)
+        return records
+
+    def apply_frame(self, df):
+        """Add the `__as_name` columns to a DataFrame of records."""
+        for name, lookup in self.lookups.items():
+            if name in df:
+                df[name + "__as_name"] = df[name].map(lookup).fillna(MISSING_NAME)
+            else:
+                df[name + "__as_name"] = MISSING_NAME
+        return df
+
+
+# indexes for the most recently used layer properties, least recent first.
+MAX_INDEXES = 64
+
+_INDEXES: "OrderedDict[Tuple[int, Any], Tuple[List[Dict[str, Any]], DomainIndex]]" = (
+    OrderedDict()
+)
+_INDEXES_LOCK = threading.Lock()
+
+
+def domain_index(props: Optional[Dict[str, Any]]) -> DomainIndex:
+    """The `DomainIndex` for a layer's properties.
+
+    Cached by the identity of the `fields` list (and the layer id), which is
+    cheap enough to look up for every record. The list is kept alongside its
+    index so its id can't be reused while cached; properties fetched or loaded
+    again, e.g. after a domain edit, are a new list and get a new index.
+    """
+    props = props or {}
+    fields = props.get("fields")
+    if not fields:
+        return DomainIndex([])
+    key = (id(fields), props.get("id"))
+
+    with _INDEXES_LOCK:
+        entry = _INDEXES.get(key)
+        if entry is not None and entry[0] is fields:
+            _INDEXES.move_to_end(key)
+            return entry[1]
+
+    index = DomainIndex(fields)
+    with _INDEXES_LOCK:
+        _INDEXES[key] = (fields, index)
+        _INDEXES.move_to_end(key)
+        while len(_INDEXES) > MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    return index
+
+
+def clear_domain_indexes():
+    with _INDEXES_LOCK:
+        _INDEXES.clear()
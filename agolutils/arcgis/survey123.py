@@ -1,18 +1,39 @@
 import json
+import threading
+import time
 import warnings
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
 
-import pandas
 from arcgis import gis
+from arcgis.features import FeatureSet
 
+from agolutils import profiling
+from agolutils.cache.attachments import AttachmentCache
+from agolutils.cache.responses import ResponseCache
 from agolutils.context import write_context
-from agolutils.utils import make_path, tomorrow, yesterday
-
+from agolutils.utils import chunked, imap_bounded, make_path, tomorrow, yesterday
+
+from .attachments import (
+    AttachmentJob,
+    AttachmentListCache,
+    attachment_jobs,
+    download_job,
+    warn_failed_downloads,
+)
+
+# imported under another name, since `download_attachments` is also the flag
+# that the context builders take.
+from .attachments import download_attachments as download_attachment_jobs
+from .decode import FieldDecoder
 from .utils import get_content
 
 warnings.filterwarnings("ignore", message=".*'infer_datetime_format' is deprecated.*")
 
+# contexts are completed and handed on this many records at a time.
+DEFAULT_FETCH_CHUNK_SIZE = 50
+
 
 def build_survey123_contexts(
     config,
@@ -27,77 +48,130 @@ def build_survey123_contexts(
     itemid = config.get("connection", {}).get("survey123", {}).get("service_id", None)
 
     obj = get_content(itemid=itemid, config=config, env=env)
-    surveys = Survey123Service(obj)
+    surveys = Survey123Service(obj, response_cache=ResponseCache.from_config(config))
 
     context_paths = surveys.write_contexts(
         oids,
         context_file_pattern=context_file_pattern,
+        **fetch_options(config),
     )
 
     return context_paths
 
 
+def fetch_options(config):
+    """Keyword arguments for `Survey123Service.write_contexts` from the config."""
+    context_format = config.get("context_format") or {}
+    return {
+        "relates_batch_size": config.get("relates_batch_size", None),
+        "download_workers": config.get("download_workers", 1),
+        "download_workers_per_host": config.get("download_workers_per_host", None),
+        "attachment_cache": AttachmentCache.from_config(config),
+        "query_workers": config.get("query_workers", 1),
+        "chunk_size": config.get("fetch_chunk_size", None),
+        "decoder": config.get("record_decoder", "fields"),
+        "compact": context_format.get("compact", False),
+        "compression": context_format.get("compression", None),
+        "share_layer_properties": config.get("share_layer_properties", False),
+    }
+
+
 def download_attachment(
     layer: gis.Layer,
     oid: int,
-    attachment_id: int,
+    attachment_id: Optional[int] = None,
     save_path: str = "./",
     filename_prefix: Optional[str] = None,
+    attachment_lists: Optional[AttachmentListCache] = None,
+    attachment: Optional[Dict[str, Any]] = None,
 ) -> Path:
+    """Download one attachment of record `oid` into `save_path`.
+
+    Pass the attachment's metadata dict, as returned by
+    `layer.attachments.get_list`, as `attachment` to skip looking it up. Given
+    only `attachment_id`, its name is looked up through `attachment_lists` so
+    the list is requested at most once per record.
+    """
     if not layer.properties.hasAttachments:
         raise ValueError("No Attachments to download.")
 
-    layer.attachments.download(  # type: ignore
-        oid=oid, attachment_id=attachment_id, save_path=save_path
+    if attachment is None:
+        if attachment_id is None:
+            raise ValueError("One of `attachment_id` or `attachment` is required.")
+        attachment_lists = attachment_lists or AttachmentListCache()
+        attachment = attachment_lists.get(layer, oid, attachment_id)
+
+    job = AttachmentJob(
+        layer=layer,
+        oid=oid,
+        attachment_id=attachment["id"],
+        name=attachment["name"],
+        save_path=save_path,
+        filename_prefix=filename_prefix,
     )
-    att = next(
-        filter(
-            lambda att: att["id"] == attachment_id,
-            layer.attachments.get_list(oid=oid),  # type: ignore
-        )
-    )
-    name = att["name"]
-
-    old_name = Path(save_path).resolve() / name
 
-    if filename_prefix is not None:
-        new_name = Path(save_path).resolve() / (filename_prefix + name)
-        old_name.replace(new_name)
-        return new_name
-    return old_name
+    return download_job(job)
 
 
 def download_all_attachments(
     layer: gis.Layer,
     oid: int,
     save_path: Optional[str] = None,
+    max_workers: int = 1,
+    max_per_host: Optional[int] = None,
+    attachment_lists: Optional[AttachmentListCache] = None,
+    attachment_cache: Optional[AttachmentCache] = None,
 ) -> List[Path]:
-    files = []
+    attachment_lists = attachment_lists or AttachmentListCache()
 
     attachments = []
     if layer.properties.hasAttachments:
-        attachments = layer.attachments.get_list(oid=oid)  # type: ignore
+        attachments = attachment_lists.get_list(layer, oid)
     name = layer.properties.name + "-"
-    for att in attachments:
-        attachment_id = att["id"]
-        f = download_attachment(
-            layer,
-            oid=oid,
-            attachment_id=attachment_id,
-            save_path=save_path or "./",
-            filename_prefix=name,
-        )
 
-        files.append(f)
+    jobs = attachment_jobs(
+        layer, oid, attachments, save_path=save_path or "./", filename_prefix=name
+    )
+    results = download_attachment_jobs(
+        jobs,
+        max_workers=max_workers,
+        max_per_host=max_per_host,
+        cache=attachment_cache,
+    )
+    warn_failed_downloads(results)
 
-    return files
+    return [r.filepath for r in results if r.ok]
 
 
-def get_layer_records_by_objectid(layer, oids: List[int]):
-    object_ids = ",".join(map(str, oids))
-    q = layer.query(object_ids=object_ids, return_geometry=False)
-    df = q.sdf
+def query_chunk_size(layer, chunk_size: Optional[int] = None) -> int:
+    """The number of oids to request per query, capped at `maxRecordCount`."""
+    max_records = layer.properties.get("maxRecordCount") or 1000
+    return min(chunk_size or max_records, max_records)
+
+
+def iter_query_by_objectid(
+    layer,
+    oids: List[int],
+    chunk_size: Optional[int] = None,
+    max_workers: int = 1,
+) -> Iterator[FeatureSet]:
+    """Query `layer` for `oids` in chunks, yielding one FeatureSet per chunk.
 
+    Chunks hold at most `chunk_size` oids and never more than the layer's
+    `maxRecordCount`, so a long oid list can't exceed the url or record limits.
+    With `max_workers` > 1 that many chunks are requested concurrently.
+    """
+
+    def query(chunk):
+        object_ids = ",".join(map(str, chunk))
+        with profiling.span("query_records"):
+            return layer.query(object_ids=object_ids, return_geometry=False)
+
+    chunks = chunked(oids, query_chunk_size(layer, chunk_size))
+    yield from imap_bounded(query, chunks, max_workers=max_workers)
+
+
+def _records_from_sdf(df):
     # for compat with pandas v2 since it can't convert from datetime64[ms]
     for col in df.select_dtypes(include=["datetime64"]).columns:
         df[col] = df[col].astype("datetime64[ns]")
@@ -105,6 +179,56 @@ def get_layer_records_by_objectid(layer, oids: List[int]):
     return json.loads(df.to_json(orient="records", date_unit="ms"))
 
 
+def records_from_featureset(layer, featureset, decoder="fields"):
+    """Convert a query result into context records.
+
+    `decoder="fields"` decodes the raw attributes with the layer's field schema
+    (see `FieldDecoder`); `decoder="pandas"` goes through the spatially enabled
+    DataFrame and json, which is slower but kept as a fallback.
+    """
+    if decoder not in ("fields", "pandas"):
+        raise ValueError(f"unknown record decoder: {decoder!r}")
+
+    with profiling.span("decode_records"):
+        if decoder == "fields":
+            records = FieldDecoder.for_layer(layer).decode_features(featureset.features)
+        else:
+            records = _records_from_sdf(featureset.sdf)
+    profiling.count("records", len(records))
+    return records
+
+
+def iter_layer_records_by_objectid(
+    layer,
+    oids: List[int],
+    chunk_size: Optional[int] = None,
+    max_workers: int = 1,
+    decoder: str = "fields",
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the records for `oids` one chunk (see `iter_query_by_objectid`) at
+    a time so large pulls never hold the whole result set in memory.
+    """
+    for featureset in iter_query_by_objectid(
+        layer, oids, chunk_size=chunk_size, max_workers=max_workers
+    ):
+        yield records_from_featureset(layer, featureset, decoder=decoder)
+
+
+def get_layer_records_by_objectid(
+    layer,
+    oids: List[int],
+    chunk_size: Optional[int] = None,
+    max_workers: int = 1,
+    decoder: str = "fields",
+):
+    records = []
+    for batch in iter_layer_records_by_objectid(
+        layer, oids, chunk_size=chunk_size, max_workers=max_workers, decoder=decoder
+    ):
+        records.extend(batch)
+    return records
+
+
 def get_layer_by_prop(service, prop, equals):
     fxn = lambda x: x.properties.get(prop) == equals  # noqa: E731
     return next(filter(fxn, service.layers + service.tables))
@@ -120,8 +244,143 @@ def get_related_tables(service, layer):
     return tables
 
 
+def _query_related(layer, oids: List[int], rel_id, **kwargs) -> Dict[str, Any]:
+    object_ids = ",".join(map(str, oids))
+    with profiling.span("query_related"):
+        return layer.query_related_records(object_ids, rel_id, **kwargs)
+
+
+def _related_groups(response: Dict[str, Any]) -> Dict[int, List[int]]:
+    related = {}
+    for g in response.get("relatedRecordGroups", []):
+        rel_oids = related.setdefault(g["objectId"], [])
+        for record in g["relatedRecords"]:
+            rel_oids.append(record["attributes"]["objectid"])
+    return related
+
+
+def query_related_oids(layer, oids: List[int], rel_id) -> Dict[int, List[int]]:
+    """Map each parent oid to its related oids with one query for all of `oids`.
+
+    The server returns at most `maxRecordCount` related records per query and
+    flags `exceededTransferLimit` when it cut some off; the parents are then
+    split in half and queried again, and a single parent's related records
+    are paged through by objectid.
+    """
+    response = _query_related(layer, oids, rel_id)
+    if not response.get("exceededTransferLimit"):
+        return _related_groups(response)
+
+    if len(oids) > 1:
+        half = len(oids) // 2
+        return {
+            **query_related_oids(layer, oids[:half], rel_id),
+            **query_related_oids(layer, oids[half:], rel_id),
+        }
+
+    oid = oids[0]
+    rel_oids: List[int] = []
+    where = None
+    while True:
+        response = _query_related(
+            layer,
+            oids,
+            rel_id,
+            definition_expression=where,
+            order_by_fields="objectid ASC",
+        )
+        page = _related_groups(response).get(oid, [])
+        rel_oids.extend(page)
+        if not (response.get("exceededTransferLimit") and page):
+            return {oid: rel_oids} if rel_oids else {}
+        where = f"objectid > {page[-1]}"
+
+
+def _build_relate(
+    table,
+    rows,
+    rel_oids,
+    context_dir,
+    download_attachments=True,
+    download_workers=1,
+    download_workers_per_host=None,
+    attachment_lists=None,
+    attachment_cache=None,
+):
+    name = table.properties.name
+    attachment_lists = attachment_lists or AttachmentListCache()
+
+    files = []
+    if download_attachments and table.properties.hasAttachments:
+        jobs = []
+        for rel_oid in rel_oids:
+            jobs.extend(
+                attachment_jobs(
+                    table,
+                    rel_oid,
+                    attachment_lists.get_list(table, rel_oid),
+                    save_path=context_dir,
+                    filename_prefix=name + "-",
+                )
+            )
+        results = download_attachment_jobs(
+            jobs,
+            max_workers=download_workers,
+            max_per_host=download_workers_per_host,
+            cache=attachment_cache,
+        )
+        warn_failed_downloads(results)
+
+        # a failed download keeps its row, with the error instead of a path.
+        save_path = Path(context_dir).resolve()
+        files = [
+            {
+                "objectid": r.job.oid,
+                "attachment_filepath": str(r.filepath.relative_to(save_path)),
+            }
+            if r.ok
+            else {"objectid": r.job.oid, "attachment_error": str(r.error)}
+            for r in results
+        ]
+
+    data = rows
+    if files:
+        # inner join on objectid, one row per attachment, like a DataFrame merge
+        attachments = {}
+        for f in files:
+            attachments.setdefault(f.pop("objectid"), []).append(f)
+        data = [
+            {**row, **attachment}
+            for row in rows
+            for attachment in attachments.get(row["objectid"], [])
+        ]
+
+    # every record shares this one dict in memory; it's only written once per
+    # file when `write_context` is given `share_layer_properties`.
+    props = slim_layer_properties(table.properties)
+    for dct in data:
+        dct["__layer_properties"] = props
+
+    return {
+        "name": name,
+        "data": data,
+        "__layer_properties": props,
+    }
+
+
 def get_related_records(
-    layer, oid, context_dir, service=None, tables=None, download_attachments=True
+    layer,
+    oid,
+    context_dir,
+    service=None,
+    tables=None,
+    download_attachments=True,
+    download_workers=1,
+    download_workers_per_host=None,
+    attachment_lists=None,
+    attachment_cache=None,
+    query_workers=1,
+    decoder="fields",
 ):
     relates = {}
 
@@ -133,52 +392,97 @@ def get_related_records(
         table = rel["table"]
         name = table.properties.name
 
-        related_record_groups = layer.query_related_records(oid, rel_id).get(
-            "relatedRecordGroups", []
-        )
-        rel_oids = []
-        for g in related_record_groups:
-            for record in g["relatedRecords"]:
-                rel_oids.append(record["attributes"]["objectid"])
+        rel_oids = query_related_oids(layer, [oid], rel_id).get(oid, [])
 
         if not rel_oids:
             return relates
 
-        files = []
-        if download_attachments and table.properties.hasAttachments:
-            for rel_oid in rel_oids:
-                save_path = Path(context_dir)
-                attachment_filepaths = download_all_attachments(
-                    table, rel_oid, save_path=context_dir
-                )
-                files.extend(
-                    [
-                        {
-                            "objectid": rel_oid,
-                            "attachment_filepath": str(
-                                f.relative_to(save_path.resolve())
-                            ),
-                        }
-                        for f in attachment_filepaths
-                    ]
-                )
+        rows = get_layer_records_by_objectid(
+            table, rel_oids, max_workers=query_workers, decoder=decoder
+        )
+
+        relates[name] = _build_relate(
+            table,
+            rows,
+            rel_oids,
+            context_dir,
+            download_attachments=download_attachments,
+            download_workers=download_workers,
+            download_workers_per_host=download_workers_per_host,
+            attachment_lists=attachment_lists,
+            attachment_cache=attachment_cache,
+        )
+
+    return relates
+
+
+def get_related_records_batch(
+    layer,
+    context_dirs: Dict[int, Union[str, Path]],
+    service=None,
+    tables=None,
+    download_attachments=True,
+    download_workers=1,
+    download_workers_per_host=None,
+    attachment_lists=None,
+    attachment_cache=None,
+    query_workers=1,
+    decoder="fields",
+):
+    """Batched `get_related_records` for every parent oid in `context_dirs`.
 
-        rel_df = table.query(
-            object_ids=",".join(map(str, rel_oids)), return_geometry=False
-        ).sdf
-        if files:
-            rel_df = rel_df.merge(pandas.DataFrame(files), on="objectid")
+    Issues one related-records query per relationship for all parents and one
+    attribute query per related table for all of their children, then splits
+    the results back out per parent. Returns a dict of `{oid: relates}` with the
+    same content `get_related_records` would produce for each oid.
+    """
+    oids = list(context_dirs)
+    relates = {oid: {} for oid in oids}
+    pending = set(oids)
+
+    if tables is None:
+        tables = get_related_tables(service, layer)
 
-        rel_df["__layer_properties"] = json.loads(
-            json.dumps(slim_layer_properties(table.properties))
+    for rel in tables:
+        if not pending:
+            break
+
+        rel_id = rel["rel_id"]
+        table = rel["table"]
+        name = table.properties.name
+
+        related = query_related_oids(layer, [o for o in oids if o in pending], rel_id)
+
+        # match the per-record path, which stops at the first empty relationship
+        pending = {oid for oid in pending if related.get(oid)}
+        if not pending:
+            break
+
+        all_rel_oids = [r for oid in oids if oid in pending for r in related[oid]]
+        batch_rows = get_layer_records_by_objectid(
+            table, all_rel_oids, max_workers=query_workers, decoder=decoder
         )
 
-        data = json.loads(rel_df.to_json(orient="records"))
-        for dct in data:
-            dct["__layer_properties"] = slim_layer_properties(table.properties)
-        relates[name] = {"name": name}
-        relates[name]["data"] = data
-        relates[name]["__layer_properties"] = slim_layer_properties(table.properties)
+        parent_of = {r: oid for oid in pending for r in related[oid]}
+        rows_by_parent = {oid: [] for oid in pending}
+        for row in batch_rows:
+            rows_by_parent[parent_of[row["objectid"]]].append(row)
+
+        for oid in oids:
+            if oid not in pending:
+                continue
+            rel_oids = related[oid]
+            relates[oid][name] = _build_relate(
+                table,
+                rows_by_parent[oid],
+                rel_oids,
+                context_dirs[oid],
+                download_attachments=download_attachments,
+                download_workers=download_workers,
+                download_workers_per_host=download_workers_per_host,
+                attachment_lists=attachment_lists,
+                attachment_cache=attachment_cache,
+            )
 
     return relates
 
@@ -199,7 +503,7 @@ def slim_layer_properties(props: dict):
     return {k: v for k, v in props.items() if k in keys}
 
 
-def get_contexts(
+def iter_contexts(
     layer,
     oids,
     context_file_pattern=None,
@@ -207,25 +511,169 @@ def get_contexts(
     get_relates=True,
     tables=None,
     service=None,
-):
-    records = get_layer_records_by_objectid(layer, oids)
+    relates_batch_size: Optional[int] = None,
+    download_workers: int = 1,
+    download_workers_per_host: Optional[int] = None,
+    attachment_lists: Optional[AttachmentListCache] = None,
+    attachment_cache: Optional[AttachmentCache] = None,
+    query_workers: int = 1,
+    chunk_size: Optional[int] = None,
+    decoder: str = "fields",
+) -> Iterator[Dict[str, Any]]:
+    """Yield a context per parent record in `oids` as soon as it is complete.
+
+    Records are queried in chunks of the layer's `maxRecordCount` and completed
+    (related records, attachments) `chunk_size` at a time, by default
+    `DEFAULT_FETCH_CHUNK_SIZE`, so the first contexts come out after one small
+    batch and memory is bounded by one chunk rather than by the whole pull.
+
+    When `relates_batch_size` is given, related records are fetched for that
+    many parents at a time with `get_related_records_batch` instead of with
+    one set of queries per parent record.
+
+    Attachments are downloaded on `download_workers` threads, with at most
+    `download_workers_per_host` running against one server at a time. A failed
+    download is reported as a warning and recorded on the attachment as
+    `attachment_error` instead of aborting the run.
+
+    Attachment lists are requested through `attachment_lists`, by default a new
+    one for this call, shared by every download in it so each record's list is
+    fetched at most once.
+    Files found in `attachment_cache` are copied from it instead of downloaded.
+
+    Up to `query_workers` chunks of records are requested concurrently, and
+    query results are turned into records by `decoder` (see
+    `records_from_featureset`).
+    """
+    attachment_lists = attachment_lists or AttachmentListCache()
     if context_file_pattern is None:
         context_file_pattern = "contexts/{globalid}.json"
 
+    chunk_size = chunk_size or DEFAULT_FETCH_CHUNK_SIZE
+    batches = (
+        batch
+        for records in iter_layer_records_by_objectid(
+            layer, oids, max_workers=query_workers, decoder=decoder
+        )
+        for batch in chunked(records, chunk_size)
+    )
+    for records in batches:
+        yield from _build_contexts(
+            layer,
+            records,
+            context_file_pattern,
+            download_attachments=download_attachments,
+            get_relates=get_relates,
+            tables=tables,
+            service=service,
+            relates_batch_size=relates_batch_size,
+            download_workers=download_workers,
+            download_workers_per_host=download_workers_per_host,
+            attachment_lists=attachment_lists,
+            attachment_cache=attachment_cache,
+            query_workers=query_workers,
+            decoder=decoder,
+        )
+
+
+def get_contexts(
+    layer,
+    oids,
+    context_file_pattern=None,
+    download_attachments=True,
+    get_relates=True,
+    tables=None,
+    service=None,
+    relates_batch_size: Optional[int] = None,
+    download_workers: int = 1,
+    download_workers_per_host: Optional[int] = None,
+    attachment_lists: Optional[AttachmentListCache] = None,
+    attachment_cache: Optional[AttachmentCache] = None,
+    query_workers: int = 1,
+    chunk_size: Optional[int] = None,
+    decoder: str = "fields",
+) -> List[Dict[str, Any]]:
+    """Build a context per parent record in `oids`; see `iter_contexts`."""
+    return list(
+        iter_contexts(
+            layer,
+            oids,
+            context_file_pattern=context_file_pattern,
+            download_attachments=download_attachments,
+            get_relates=get_relates,
+            tables=tables,
+            service=service,
+            relates_batch_size=relates_batch_size,
+            download_workers=download_workers,
+            download_workers_per_host=download_workers_per_host,
+            attachment_lists=attachment_lists,
+            attachment_cache=attachment_cache,
+            query_workers=query_workers,
+            chunk_size=chunk_size,
+            decoder=decoder,
+        )
+    )
+
+
+def _build_contexts(
+    layer,
+    records,
+    context_file_pattern,
+    download_attachments=True,
+    get_relates=True,
+    tables=None,
+    service=None,
+    relates_batch_size=None,
+    download_workers=1,
+    download_workers_per_host=None,
+    attachment_lists=None,
+    attachment_cache=None,
+    query_workers=1,
+    decoder="fields",
+):
+    batched_relates = {}
+    if get_relates and relates_batch_size:
+        context_dirs = {
+            record["objectid"]: make_path(context_file_pattern.format(**record)).parent
+            for record in records
+        }
+        chunk_oids = list(context_dirs)
+        for i in range(0, len(chunk_oids), relates_batch_size):
+            chunk = chunk_oids[i : i + relates_batch_size]
+            batched_relates.update(
+                get_related_records_batch(
+                    layer,
+                    {oid: context_dirs[oid] for oid in chunk},
+                    tables=tables,
+                    service=service,
+                    download_attachments=download_attachments,
+                    download_workers=download_workers,
+                    download_workers_per_host=download_workers_per_host,
+                    attachment_lists=attachment_lists,
+                    attachment_cache=attachment_cache,
+                    query_workers=query_workers,
+                    decoder=decoder,
+                )
+            )
+
+    layer_props = slim_layer_properties(layer.properties)
     contexts = []
+    pending_attachments = []
     for record in records:
         context = record
         outpath = make_path(context_file_pattern.format(**context))
         outdir = outpath.parent
 
         oid = context["objectid"]
-        context["__layer_properties"] = slim_layer_properties(layer.properties)
+        context["__layer_properties"] = layer_props
         context["_layer_name"] = context["__layer_properties"].get(
             "name", "no-layer-name"
         )
         context["_filepath"] = outpath
 
-        if get_relates:
+        if get_relates and relates_batch_size:
+            context["relates"] = batched_relates[oid]
+        elif get_relates:
             context["relates"] = get_related_records(
                 layer,
                 oid,
@@ -233,28 +681,114 @@ def get_contexts(
                 tables=tables,
                 service=service,
                 download_attachments=download_attachments,
+                download_workers=download_workers,
+                download_workers_per_host=download_workers_per_host,
+                attachment_lists=attachment_lists,
+                attachment_cache=attachment_cache,
+                query_workers=query_workers,
+                decoder=decoder,
             )
 
         if download_attachments and layer.properties.hasAttachments:
-            attachments = layer.attachments.get_list(oid)
-            for att in attachments:
-                file = download_attachment(
-                    layer,
-                    oid=oid,
-                    attachment_id=att["id"],
-                    save_path=str(outdir),
-                    filename_prefix=context["_layer_name"] + "-",
-                )
-
-                att["attachment_filepath"] = str(file.relative_to(outdir.resolve()))
+            attachments = attachment_lists.get_list(layer, oid)
+            jobs = attachment_jobs(
+                layer,
+                oid,
+                attachments,
+                save_path=outdir,
+                filename_prefix=context["_layer_name"] + "-",
+            )
+            pending_attachments.extend(zip(attachments, jobs, strict=True))
             context["attachments"] = attachments
 
         contexts.append(context)
 
+    results = download_attachment_jobs(
+        [job for _, job in pending_attachments],
+        max_workers=download_workers,
+        max_per_host=download_workers_per_host,
+        cache=attachment_cache,
+    )
+    warn_failed_downloads(results)
+    for (att, job), result in zip(pending_attachments, results, strict=True):
+        if result.ok:
+            outdir = Path(job.save_path).resolve()
+            att["attachment_filepath"] = str(result.filepath.relative_to(outdir))
+        else:
+            att["attachment_error"] = str(result.error)
+
     return contexts
 
 
-def get_recent(layer, related_tables=None, start_date=None, end_date=None):
+@dataclass
+class RecentQueryStats:
+    """Query counts and timings from one `get_recent` call.
+
+    `timed` is called from the query threads, so updates take `_lock`.
+    `get_recent` adds the totals to the profiling counters when it's done.
+    """
+
+    queries: int = 0
+    query_seconds: float = 0.0
+    seconds: float = 0.0
+    related_globalids: int = 0
+    globalid_chunks: int = 0
+    per_table: Dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def timed(self, fxn, *args, name=None, **kwargs):
+        """Call `fxn`, counting it as one query, timed under `name` if given."""
+        start = time.perf_counter()
+        try:
+            return fxn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.queries += 1
+                self.query_seconds += elapsed
+                if name is not None:
+                    self.per_table[name] = self.per_table.get(name, 0.0) + elapsed
+
+    def report(self):
+        profiling.count("recent_queries", self.queries)
+        profiling.count("recent_query_seconds", self.query_seconds)
+        profiling.count("recent_related_globalids", self.related_globalids)
+        profiling.count("recent_globalid_chunks", self.globalid_chunks)
+
+
+def _recent_parent_globalids(table, where) -> List[str]:
+    with profiling.span("query_recent"):
+        fs = table.query(where, out_fields=["parentglobalid"], return_geometry=False)
+    return [f.attributes.get("parentglobalid") for f in fs.features]
+
+
+def _query_oids(layer, where) -> List[int]:
+    with profiling.span("query_recent"):
+        result = layer.query(where, return_ids_only=True)
+    return result.get("objectIds") or []
+
+
+def get_recent(
+    layer,
+    related_tables=None,
+    start_date=None,
+    end_date=None,
+    max_workers: int = 4,
+    globalid_chunk_size: int = 500,
+    stats: Optional[RecentQueryStats] = None,
+) -> List[int]:
+    """Object ids of parent records edited between `start_date` and `end_date`,
+    or whose related records were, sorted and without duplicates.
+
+    Related tables are queried on up to `max_workers` threads. Parents of
+    recently edited related records are looked up `globalid_chunk_size`
+    globalids per query so no where clause grows past the server's limits.
+    Pass a `RecentQueryStats` as `stats` to collect query counts and timings.
+    """
+    start = time.perf_counter()
+    stats = stats if stats is not None else RecentQueryStats()
     if related_tables is None:
         related_tables = []
     if start_date is None:
@@ -262,81 +796,114 @@ def get_recent(layer, related_tables=None, start_date=None, end_date=None):
     if end_date is None:
         end_date = tomorrow()
 
-    edit_field = layer.properties["editFieldsInfo"]["editDateField"]
     time_query = "{e} >= DATE '{start_date}' and {e} <= DATE '{end_date}'"
 
-    globalids = None
-
-    if related_tables:
-        dfs = []
-        for t in related_tables:
-            tedit_field = t["table"].properties["editFieldsInfo"]["editDateField"]
-            sdf = (
-                t["table"]
-                .query(
-                    time_query.format(
-                        e=tedit_field, start_date=start_date, end_date=end_date
-                    ),
-                    out_fields=["parentglobalid"],
-                    return_geometry=False,
-                )
-                .sdf
-            )
-            if not sdf.empty:
-                dfs.extend(sdf["parentglobalid"].unique())
-        recent_surveys = set(dfs)
-        globalids = ", ".join([f"'{x}'" for x in recent_surveys])
+    def edited(table):
+        edit_field = table.properties["editFieldsInfo"]["editDateField"]
+        return time_query.format(e=edit_field, start_date=start_date, end_date=end_date)
 
-    q = f"({time_query.format(e=edit_field, start_date=start_date, end_date=end_date)})"
-    if globalids:
-        q += f"or (globalid in ({globalids}))"
+    def related_query(t):
+        name = t["table"].properties.get("name")
+        return stats.timed(
+            _recent_parent_globalids, t["table"], edited(t["table"]), name=name
+        )
 
-    sdf = layer.query(q, out_fields=["objectid"], return_geometry=False).sdf
+    recent_surveys = set()
+    for gids in imap_bounded(related_query, related_tables, max_workers=max_workers):
+        recent_surveys.update(g for g in gids if g)
+    stats.related_globalids = len(recent_surveys)
+
+    wheres = [f"({edited(layer)})"]
+    for chunk in chunked(sorted(recent_surveys), globalid_chunk_size):
+        globalids = ", ".join([f"'{x}'" for x in chunk])
+        wheres.append(f"globalid in ({globalids})")
+    stats.globalid_chunks = len(wheres) - 1
+
+    oids = set()
+    for chunk_oids in imap_bounded(
+        lambda where: stats.timed(_query_oids, layer, where),
+        wheres,
+        max_workers=max_workers,
+    ):
+        oids.update(chunk_oids)
 
-    return [] if sdf.empty else sdf["objectid"].to_list()
+    stats.seconds = time.perf_counter() - start
+    stats.report()
+    return sorted(oids)
 
 
 class Survey123Service:
-    def __init__(self, item: gis.Item):
+    """A Survey123 feature service item.
+
+    With a `response_cache`, the survey layer's and related tables' queries
+    and attachment lists are served from it where possible; see
+    `agolutils.cache.ResponseCache`.
+    """
+
+    def __init__(self, item: gis.Item, response_cache: Optional[ResponseCache] = None):
         self.service = item
+        self.response_cache = response_cache
 
         self._survey_layer = None
         self._survey_properties = None
         self._related_tables = None
 
+    def _wrap(self, layer):
+        if self.response_cache is None:
+            return layer
+        return self.response_cache.wrap(layer)
+
     @property
     def survey_layer(self):
         if self._survey_layer is None:
-            self._survey_layer = self.service.layers[0]  # type: ignore
+            self._survey_layer = self._wrap(self.service.layers[0])  # type: ignore
         return self._survey_layer
 
     @property
     def related_tables(self):
         if self._related_tables is None:
-            self._related_tables = get_related_tables(self.service, self.survey_layer)
+            tables = get_related_tables(self.service, self.survey_layer)
+            for rel in tables:
+                rel["table"] = self._wrap(rel["table"])
+            if self.response_cache is not None:
+                self.survey_layer.related_tables.update(
+                    {rel["rel_id"]: rel["table"] for rel in tables}
+                )
+            self._related_tables = tables
         return self._related_tables
 
-    def get_recent(self, start_date=None, end_date=None):
+    def get_recent(self, start_date=None, end_date=None, **kwargs):
         return get_recent(
             self.survey_layer,
             related_tables=self.related_tables,
             start_date=start_date,
             end_date=end_date,
+            **kwargs,
         )
 
     def get_related_records(self, oid, context_dir):
         return get_related_records(
-            self.survey_layer, oid, context_dir, tables=self.related_tables
+            self.survey_layer,
+            oid,
+            context_dir,
+            tables=self.related_tables,
         )
 
-    def get_contexts(
+    def iter_contexts(
         self,
         oids,
         context_file_pattern=None,
         download_attachments=True,
         get_relates=True,
+        relates_batch_size=None,
+        download_workers=1,
+        download_workers_per_host=None,
+        attachment_cache=None,
+        query_workers=1,
+        chunk_size=None,
+        decoder="fields",
     ):
-        return get_contexts(
+        return iter_contexts(
             self.survey_layer,
             oids,
             tables=self.related_tables,
@@ -344,26 +911,126 @@ class Survey123Service:
             context_file_pattern=context_file_pattern,
             download_attachments=download_attachments,
             get_relates=get_relates,
+            relates_batch_size=relates_batch_size,
+            download_workers=download_workers,
+            download_workers_per_host=download_workers_per_host,
+            attachment_cache=attachment_cache,
+            query_workers=query_workers,
+            chunk_size=chunk_size,
+            decoder=decoder,
         )
 
-    def write_contexts(
+    def get_contexts(
         self,
         oids,
         context_file_pattern=None,
         download_attachments=True,
         get_relates=True,
+        relates_batch_size=None,
+        download_workers=1,
+        download_workers_per_host=None,
+        attachment_cache=None,
+        query_workers=1,
+        chunk_size=None,
+        decoder="fields",
     ):
-        filepaths = []
+        return list(
+            self.iter_contexts(
+                oids,
+                context_file_pattern=context_file_pattern,
+                download_attachments=download_attachments,
+                get_relates=get_relates,
+                relates_batch_size=relates_batch_size,
+                download_workers=download_workers,
+                download_workers_per_host=download_workers_per_host,
+                attachment_cache=attachment_cache,
+                query_workers=query_workers,
+                chunk_size=chunk_size,
+                decoder=decoder,
+            )
+        )
 
-        contexts = self.get_contexts(
+    def iter_write_contexts(
+        self,
+        oids,
+        context_file_pattern=None,
+        download_attachments=True,
+        get_relates=True,
+        relates_batch_size=None,
+        download_workers=1,
+        download_workers_per_host=None,
+        attachment_cache=None,
+        query_workers=1,
+        chunk_size=None,
+        decoder="fields",
+        compact=False,
+        compression=None,
+        share_layer_properties=False,
+    ) -> Iterator[Path]:
+        """Write each context as soon as it is complete and yield its path.
+
+        Takes the arguments of `iter_contexts`, plus the `compact`,
+        `compression` and `share_layer_properties` options of
+        `write_context`. Contexts that were written before a failure stay on
+        disk.
+        """
+        contexts = self.iter_contexts(
             oids,
             context_file_pattern=context_file_pattern,
             download_attachments=download_attachments,
             get_relates=get_relates,
+            relates_batch_size=relates_batch_size,
+            download_workers=download_workers,
+            download_workers_per_host=download_workers_per_host,
+            attachment_cache=attachment_cache,
+            query_workers=query_workers,
+            chunk_size=chunk_size,
+            decoder=decoder,
         )
-
         for context in contexts:
-            file = write_context(context, context.get("_filepath", None))
-            filepaths.append(file)
+            with profiling.span("write_context"):
+                path = write_context(
+                    context,
+                    context.get("_filepath", None),
+                    compact=compact,
+                    compression=compression,
+                    share_layer_properties=share_layer_properties,
+                )
+            profiling.count("contexts_written")
+            yield path
 
-        return filepaths
+    def write_contexts(
+        self,
+        oids,
+        context_file_pattern=None,
+        download_attachments=True,
+        get_relates=True,
+        relates_batch_size=None,
+        download_workers=1,
+        download_workers_per_host=None,
+        attachment_cache=None,
+        query_workers=1,
+        chunk_size=None,
+        decoder="fields",
+        compact=False,
+        compression=None,
+        share_layer_properties=False,
+    ) -> List[Path]:
+        return list(
+            self.iter_write_contexts(
+                oids,
+                context_file_pattern=context_file_pattern,
+                download_attachments=download_attachments,
+                get_relates=get_relates,
+                relates_batch_size=relates_batch_size,
+                download_workers=download_workers,
+                download_workers_per_host=download_workers_per_host,
+                attachment_cache=attachment_cache,
+                query_workers=query_workers,
+                chunk_size=chunk_size,
+                decoder=decoder,
+                compact=compact,
+                compression=compression,
+                share_layer_properties=share_layer_properties,
+            )
+        )
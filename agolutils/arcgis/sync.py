@@ -0,0 +1,192 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from agolutils.context.context import find_context_file
+from agolutils.utils import chunked, format_date
+
+from .survey123 import Survey123Service, fetch_options, query_chunk_size
+from .utils import get_content
+
+STATE_FILENAME = ".agolutils-sync.json"
+
+
+def load_sync_state(path: Union[str, Path]) -> Dict[str, Any]:
+    path = Path(path)
+    if not path.is_file():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_sync_state(state: Dict[str, Any], path: Union[str, Path]) -> Path:
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.replace(path)
+    return path
+
+
+def date_to_ms(date: str) -> int:
+    """Convert a 'YYYY-MM-DD' string (UTC) into an AGOL millisecond timestamp."""
+    dt = datetime.datetime.strptime(date, "%Y-%m-%d")
+    return int(dt.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000)
+
+
+def edited_since_query(edit_field: str, since: Optional[int]) -> str:
+    if since is None:
+        return "1=1"
+    # inclusive, and truncated to the second, so records edited in the same
+    # second as the watermark aren't missed; `edited_since` then drops the
+    # ones that aren't newer than the watermark to the millisecond.
+    return f"{edit_field} >= TIMESTAMP '{format_date(since, fmt='query')}'"
+
+
+def edited_since(row: Dict[str, Any], edit_field: str, since: Optional[int]) -> bool:
+    return since is None or (row.get(edit_field) or 0) > since
+
+
+def _query_attributes(layer, where, out_fields="*") -> List[Dict[str, Any]]:
+    q = layer.query(where, out_fields=out_fields, return_geometry=False)
+    return [f.attributes for f in q.features]
+
+
+def context_exists(context_file_pattern: str, record: Dict[str, Any]) -> bool:
+    try:
+        path = context_file_pattern.format(**record)
+    except (KeyError, IndexError):
+        return False
+    return find_context_file(path) is not None
+
+
+def get_changed_records(
+    surveys: Survey123Service,
+    parent_since: Optional[int] = None,
+    related_since: Optional[Dict[str, int]] = None,
+    seen: Optional[Iterable[str]] = None,
+    globalid_chunk_size: int = 500,
+):
+    """Find survey records edited since the given watermarks.
+
+    Returns `(records, child_globalids, parent_mark, related_marks)` where
+    `records` are the parent attributes to consider, `child_globalids` are the
+    parent globalids that have edited related records, and the marks are the
+    new high-water edit dates for the parent layer and each related table.
+
+    Records are only returned if edited after their watermark, except that a
+    parent whose globalid isn't in `seen` is returned even if it was edited in
+    the watermark's second. Parents of edited related records are looked up
+    `globalid_chunk_size` (at most the layer's `maxRecordCount`) at a time.
+    """
+    layer = surveys.survey_layer
+    edit_field = layer.properties["editFieldsInfo"]["editDateField"]
+    related_since = related_since or {}
+    related_marks = dict(related_since)
+    seen = set(seen or [])
+
+    records = [
+        r
+        for r in _query_attributes(layer, edited_since_query(edit_field, parent_since))
+        if edited_since(r, edit_field, parent_since) or r["globalid"] not in seen
+    ]
+    parent_mark = parent_since
+    for r in records:
+        parent_mark = max(parent_mark or 0, r.get(edit_field) or 0)
+
+    child_globalids = set()
+    for rel in surveys.related_tables:
+        table = rel["table"]
+        name = table.properties.name
+        tedit_field = table.properties["editFieldsInfo"]["editDateField"]
+        rows = _query_attributes(
+            table,
+            edited_since_query(tedit_field, related_marks.get(name)),
+            out_fields=f"parentglobalid,{tedit_field}",
+        )
+        for row in rows:
+            if not edited_since(row, tedit_field, related_since.get(name)):
+                continue
+            child_globalids.add(row["parentglobalid"])
+            related_marks[name] = max(
+                related_marks.get(name) or 0, row.get(tedit_field) or 0
+            )
+
+    missing = child_globalids - {r["globalid"] for r in records}
+    for chunk in chunked(sorted(missing), query_chunk_size(layer, globalid_chunk_size)):
+        globalids = ", ".join([f"'{x}'" for x in chunk])
+        records += _query_attributes(layer, f"globalid in ({globalids})")
+
+    return records, child_globalids, parent_mark, related_marks
+
+
+def sync_survey123_contexts(
+    config,
+    env: Optional[Union[str, Path]] = None,
+    context_file_pattern=None,
+    state_file: Optional[Union[str, Path]] = None,
+    since: Optional[str] = None,
+) -> List[Path]:
+    """Write contexts only for surveys changed since the last sync.
+
+    The high-water edit dates of the survey layer and each related table, and the
+    globalids written so far, are kept per service in `state_file` (by default
+    `.agolutils-sync.json` next to the config). `since` ('YYYY-MM-DD') bounds the
+    first sync of a service; without it the first sync fetches every record.
+
+    A survey whose context file already exists is skipped unless one of its
+    related records changed, since that doesn't change the parent's EditDate.
+    """
+    context_file_pattern = (
+        context_file_pattern
+        or config.get("context_file_pattern", None)
+        or "contexts/{globalid}.json"
+    )
+
+    itemid = config.get("connection", {}).get("survey123", {}).get("service_id", None)
+    state_file = state_file or Path(config["__config_relpath"]) / STATE_FILENAME
+    state = load_sync_state(state_file)
+    service_state = state.get(itemid, {})
+
+    obj = get_content(itemid=itemid, config=config, env=env)
+    surveys = Survey123Service(obj)
+
+    parent_since = service_state.get("parent_edit_date")
+    related_since = service_state.get("related_edit_dates")
+    if since and parent_since is None:
+        parent_since = date_to_ms(since)
+    if since and related_since is None:
+        related_since = {
+            rel["table"].properties.name: date_to_ms(since)
+            for rel in surveys.related_tables
+        }
+
+    seen = set(service_state.get("globalids", []))
+    records, child_globalids, parent_mark, related_marks = get_changed_records(
+        surveys, parent_since=parent_since, related_since=related_since, seen=seen
+    )
+
+    oids = [
+        r["objectid"]
+        for r in records
+        if r["globalid"] in child_globalids
+        or not context_exists(context_file_pattern, r)
+    ]
+
+    context_paths = []
+    if oids:
+        context_paths = surveys.write_contexts(
+            oids,
+            context_file_pattern=context_file_pattern,
+            **fetch_options(config),
+        )
+
+    seen.update(r["globalid"] for r in records)
+
+    state[itemid] = {
+        "parent_edit_date": parent_mark,
+        "related_edit_dates": related_marks,
+        "globalids": sorted(seen),
+    }
+    save_sync_state(state, state_file)
+
+    return context_paths
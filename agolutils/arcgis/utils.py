@@ -1,13 +1,23 @@
+import datetime
 import io
 import json
+import re
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 from arcgis.gis import GIS, Item
 from dotenv import dotenv_values
 
+from agolutils import profiling
+from agolutils.cache.tokens import TokenCache
 from agolutils.config.config import load_config
+from agolutils.context.context import resolve_layer_properties
+
+from .domains import domain_filter as domain_filter
+from .domains import domain_index
 
 
 class RedirectStdStreams(object):
@@ -28,16 +38,11 @@ class RedirectStdStreams(object):
         sys.stderr = self.old_stderr
 
 
-def _get_gis(dct):
+def _connect(**kwargs) -> GIS:
     f = io.StringIO()
 
-    with RedirectStdStreams(stdout=f, stderr=f):
-        gis_connection = GIS(
-            url=dct.get("ARCGIS_URL", None),
-            username=dct["ARCGIS_USERNAME"],
-            password=dct["ARCGIS_PASSWORD"],
-            verify_cert=json.loads(dct.get("VERIFY_CERT", "true")),
-        )
+    with RedirectStdStreams(stdout=f, stderr=f), profiling.span("gis_login"):
+        gis_connection = GIS(**kwargs)
     s = f.getvalue().splitlines()
     for line in s:
         if "Setting `verify_cert` to False is a security risk".lower() in line.lower():
@@ -47,27 +52,172 @@ def _get_gis(dct):
     return gis_connection
 
 
-def get_gis_from_env(env) -> GIS:
+def _session_token(gis: GIS) -> Optional[str]:
+    try:
+        return gis._con.token
+    except Exception:
+        return None
+
+
+# where arcgis keeps the token expiry the server reported, by version.
+_EXPIRY_ATTRS = [
+    ("_con", "_expiration"),
+    ("_con", "_auth", "_expiration"),
+    ("_con", "_session", "auth", "_expiration"),
+]
+
+
+def _epoch_seconds(value) -> Optional[float]:
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        # the rest api reports expiries in epoch milliseconds.
+        return value / 1000 if value > 1e11 else float(value)
+    return None
+
+
+def _session_expires(gis: GIS) -> Optional[float]:
+    """When the GIS's token expires (epoch seconds), if arcgis kept it."""
+    for attrs in _EXPIRY_ATTRS:
+        value = gis
+        for attr in attrs:
+            value = getattr(value, attr, None)
+        expires = _epoch_seconds(value)
+        if expires is not None:
+            return expires
+    return None
+
+
+# the server's "invalid token" (498) and "token required" (499) errors.
+_TOKEN_ERROR = re.compile(r"\b49[89]\b|invalid token|token required", re.IGNORECASE)
+
+
+def _is_token_error(exc: Exception) -> bool:
+    return bool(_TOKEN_ERROR.search(str(exc)))
+
+
+def _login(
+    dct, token_cache: Optional[TokenCache] = None
+) -> Tuple[GIS, Optional[float]]:
+    """Log in with the cached token if there is one, otherwise the password.
+
+    Returns the GIS and when its token expires, if that's known.
+    """
+    url = dct.get("ARCGIS_URL", None)
+    username = dct["ARCGIS_USERNAME"]
+    verify_cert = json.loads(dct.get("VERIFY_CERT", "true"))
+
+    entry = token_cache.entry(url, username) if token_cache is not None else None
+    if entry:
+        try:
+            gis_connection = _connect(
+                url=url, token=entry["token"], verify_cert=verify_cert
+            )
+            return gis_connection, _session_expires(gis_connection) or entry["expires"]
+        except Exception as e:
+            if not _is_token_error(e):
+                raise
+            # revoked or otherwise rejected; log in again below.
+            token_cache.remove(url, username)
+
+    gis_connection = _connect(
+        url=url,
+        username=username,
+        password=dct["ARCGIS_PASSWORD"],
+        verify_cert=verify_cert,
+    )
+    expires = _session_expires(gis_connection)
+    if token_cache is not None and (token := _session_token(gis_connection)):
+        token_cache.put(url, username, token, expires)
+    return gis_connection, expires
+
+
+# a session's token is treated as expired this many seconds early.
+EXPIRY_MARGIN = 60
+
+# logged in GIS connections, and when their tokens expire, reused until then.
+_sessions: Dict[Tuple[Any, ...], Tuple[GIS, Optional[float]]] = {}
+_sessions_lock = threading.Lock()
+
+
+def _expired(gis: GIS, expires: Optional[float]) -> bool:
+    # a password login renews its own token, so prefer what the GIS has now.
+    expires = _session_expires(gis) or expires
+    return expires is not None and time.time() > expires - EXPIRY_MARGIN
+
+
+def _get_gis(dct, token_cache: Optional[TokenCache] = None, relogin: bool = False):
+    url = dct.get("ARCGIS_URL", None)
+    key = (url, dct["ARCGIS_USERNAME"], dct.get("VERIFY_CERT", "true"))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is not None and (relogin or _expired(*session)):
+            # a GIS built from a token can't renew it, so start over with the
+            # password rather than reuse the session or the cached token.
+            del _sessions[key]
+            if token_cache is not None:
+                token_cache.remove(url, dct["ARCGIS_USERNAME"])
+            session = None
+        elif session is None and relogin and token_cache is not None:
+            token_cache.remove(url, dct["ARCGIS_USERNAME"])
+
+        if session is None:
+            session = _sessions[key] = _login(dct, token_cache)
+        else:
+            profiling.count("gis_sessions_reused")
+
+    return session[0]
+
+
+def clear_sessions():
+    """Forget the GIS connections kept by `get_gis`, so the next call logs in."""
+    with _sessions_lock:
+        _sessions.clear()
+
+
+def get_gis_from_env(
+    env, token_cache: Optional[TokenCache] = None, relogin: bool = False
+) -> GIS:
     config = dotenv_values(env)
 
-    return _get_gis(config)
+    return _get_gis(config, token_cache, relogin)
 
 
-def get_gis_from_config(config: Union[Dict, str, Path]) -> GIS:
+def get_gis_from_config(
+    config: Union[Dict, str, Path],
+    token_cache: Optional[TokenCache] = None,
+    relogin: bool = False,
+) -> GIS:
     config = load_config(config)
 
-    return _get_gis(config)
+    return _get_gis(config, token_cache, relogin)
 
 
 def get_gis(
     config: Optional[Union[Dict, str, Path]] = None,
     env: Optional[Union[str, Path]] = None,
+    token_cache: Optional[TokenCache] = None,
+    relogin: bool = False,
 ) -> GIS:
+    """A logged in GIS, shared with earlier calls for the same url and user
+    until its token expires.
+
+    With a `token_cache` (or `token_cache` set in the config), the login's
+    token is saved and used by later runs instead of the password until it
+    expires. `relogin` drops the shared GIS and the cached token and logs in
+    with the password, e.g. after the server rejected the token.
+    """
+    if token_cache is None and config:
+        try:
+            token_cache = TokenCache.from_config(load_config(config))
+        except FileNotFoundError:
+            pass
+
     try:
-        return get_gis_from_env(env)
+        return get_gis_from_env(env, token_cache, relogin)
     except FileNotFoundError:
         if config:
-            return get_gis_from_config(config)
+            return get_gis_from_config(config, token_cache, relogin)
     raise ValueError("One of `config` or `env` is required.")
 
 
@@ -79,7 +229,17 @@ def get_content(
     config = load_config(config)
     gis = get_gis(config, env)
 
-    return gis.content.get(itemid)
+    with profiling.span("get_item"):
+        try:
+            return gis.content.get(itemid)
+        except Exception as e:
+            if not _is_token_error(e):
+                raise
+
+    # the token expired or was revoked under us; log in with the password.
+    gis = get_gis(config, env, relogin=True)
+    with profiling.span("get_item"):
+        return gis.content.get(itemid)
 
 
 def get_layer_by_prop(obj: Item, prop: str, equals: Any):
@@ -87,28 +247,25 @@ def get_layer_by_prop(obj: Item, prop: str, equals: Any):
     return next(filter(fxn, (obj.layers or []) + (obj.tables or [])))
 
 
-def domain_filter(x):
-    return (x.get("domain") is not None) and (
-        x.get("domain", {}).get("type", None) == "codedValue"
-    )
-
+def remap_domains_as_name(context, layers=None):
+    """Add a `<field>__as_name` entry for each coded-value field of `context`.
 
-def remap_domains_as_name(context):
-    fields = context.get("__layer_properties", {}).get("fields", [])
-    domain_fields = filter(domain_filter, fields)
-    for field in domain_fields:
-        name = field["name"]
-        domain = field["domain"]
-        mapping = {d["code"]: d["name"] for d in domain["codedValues"]}
-        context[name + "__as_name"] = mapping.get(context.get(name), "None")
-
-    return context
+    The layer properties are read from the record or, for contexts written
+    with shared layer properties, looked up in `layers` (by default the
+    context's own `__layers`).
+    """
+    layers = context.get("__layers") if layers is None else layers
+    return domain_index(resolve_layer_properties(context, layers)).apply(context)
 
 
 def remap_related_domains_as_name(context):
+    layers = context.get("__layers")
     relates = context.get("relates", {})
     for relate in relates.values():
-        for data_ctx in relate["data"]:
-            remap_domains_as_name(data_ctx)
+        data = relate["data"]
+        props = resolve_layer_properties(relate, layers)
+        if props is None and data:
+            props = resolve_layer_properties(data[0], layers)
+        domain_index(props).apply_records(data)
 
     return context
@@ -0,0 +1,14 @@
+from .attachments import AttachmentCache
+from .command import app
+from .images import ImageCache
+from .responses import ResponseCache, ResponseCacheMiss
+from .tokens import TokenCache
+
+__all__ = [
+    "app",
+    "AttachmentCache",
+    "ImageCache",
+    "ResponseCache",
+    "ResponseCacheMiss",
+    "TokenCache",
+]
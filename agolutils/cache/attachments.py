@@ -0,0 +1,88 @@
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .base import DiskCache, cache_settings, temp_path
+
+
+class AttachmentCache(DiskCache):
+    """On-disk cache of downloaded attachments shared across runs.
+
+    Files are keyed by (service item id, layer id, attachment id, size, keywords)
+    so an attachment is downloaded once and then copied (or hard-linked) into
+    every context directory that needs it. When `max_bytes` is set the least
+    recently used files are evicted to keep the cache under that size.
+    """
+
+    name = "attachments"
+    env_var = "AGOLUTILS_ATTACHMENT_CACHE_DIR"
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_bytes: Optional[int] = None,
+        link: bool = False,
+    ):
+        super().__init__(path, max_bytes)
+        self.link = link
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["AttachmentCache"]:
+        cfg = cache_settings(config, "attachment_cache")
+        if cfg is None:
+            return None
+        return cls(
+            path=cfg.get("path"),
+            max_bytes=cfg["max_bytes"],
+            link=cfg.get("link", False),
+        )
+
+    @staticmethod
+    def key(
+        service_id: Any,
+        layer_id: Any,
+        attachment_id: Any,
+        size: Any = None,
+        keywords: Any = None,
+    ) -> str:
+        raw = "/".join(map(str, [service_id, layer_id, attachment_id, size, keywords]))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _object_path(self, key: str) -> Path:
+        return self.path / key[:2] / key
+
+    def get(self, key: str, target: Union[str, Path]) -> Optional[Path]:
+        """Place the cached file for `key` at `target`, or return None on a miss."""
+        cached = self._object_path(key)
+        if not cached.is_file():
+            return None
+
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self._place(cached, target)
+        self.touched(cached)
+        return target
+
+    def put(self, key: str, source: Union[str, Path]) -> Path:
+        cached = self._object_path(key)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = temp_path(cached)
+        shutil.copyfile(source, tmp)
+        tmp.replace(cached)
+
+        self.added()
+        return cached
+
+    def _place(self, cached: Path, target: Path):
+        if target.exists():
+            target.unlink()
+        if self.link:
+            try:
+                os.link(cached, target)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(cached, target)
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+CACHE_ROOT = Path("~/.cache/agolutils")
+
+# prune against `max_bytes` on the first write and then every this many writes,
+# rather than globbing the whole cache after each one.
+PRUNE_EVERY = 64
+
+
+def default_cache_dir(name: str, env_var: str) -> Path:
+    """`$env_var` if set, otherwise `name` under `$AGOLUTILS_CACHE_DIR`, which
+    defaults to ~/.cache/agolutils.
+    """
+    path = os.environ.get(env_var)
+    if not path:
+        path = Path(os.environ.get("AGOLUTILS_CACHE_DIR") or CACHE_ROOT) / name
+    return Path(path).expanduser()
+
+
+def cache_settings(
+    config: Dict[str, Any],
+    key: str,
+    default: Any = None,
+    section: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """A cache's `key` entry of `config` (or of its `section`), or None if
+    it's turned off.
+
+    `true` means the defaults and a string is the cache's `path`. A relative
+    `path` is resolved against the config's directory, and `max_size_mb` and
+    `ttl_minutes` become `max_bytes` and `ttl` (seconds).
+    """
+    settings = (config.get(section) or {}) if section else config
+    cfg = settings.get(key, default)
+    if not cfg:
+        return None
+    if cfg is True:
+        cfg = {}
+    elif isinstance(cfg, (str, Path)):
+        cfg = {"path": cfg}
+    else:
+        cfg = dict(cfg)
+
+    path = cfg.get("path")
+    if path and not Path(path).expanduser().is_absolute():
+        cfg["path"] = Path(config["__config_relpath"]) / path
+
+    max_size_mb = cfg.pop("max_size_mb", None)
+    cfg["max_bytes"] = (
+        int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None
+    )
+    ttl_minutes = cfg.pop("ttl_minutes", None)
+    cfg["ttl"] = ttl_minutes * 60 if ttl_minutes is not None else None
+    return cfg
+
+
+def temp_path(path: Path) -> Path:
+    """A temporary name next to `path` to write to before renaming over it.
+
+    Unique per process and thread, since caches are shared between runs.
+    """
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+class DiskCache:
+    """Files kept under `path`, in `??/` subdirectories by key, that can be
+    evicted least recently used first.
+
+    Subclasses set `name` and `env_var` for their default directory (see
+    `default_cache_dir`) and `pattern` to match their files under `path`. They
+    call `touched` on a hit and `added` after a write.
+    """
+
+    name = "files"
+    env_var = "AGOLUTILS_FILES_CACHE_DIR"
+    pattern = "??/*"
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        if path:
+            self.path = Path(path).expanduser()
+        else:
+            self.path = default_cache_dir(self.name, self.env_var)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def touched(self, path: Path):
+        # touch on hit so eviction is least-recently-used, not first-in.
+        os.utime(path)
+
+    def added(self):
+        """Count a write, pruning to `max_bytes` every `PRUNE_EVERY` writes."""
+        with self._lock:
+            self._puts += 1
+            prune = self.max_bytes is not None and self._puts % PRUNE_EVERY == 1
+        if prune:
+            self.prune()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Cached files, least recently used first."""
+        if not self.path.is_dir():
+            return []
+
+        entries = []
+        for p in self.path.glob(self.pattern):
+            if p.suffix == ".tmp" or not p.is_file():
+                continue
+            st = p.stat()
+            entries.append({"path": p, "size": st.st_size, "used": st.st_mtime})
+        return sorted(entries, key=lambda e: e["used"])
+
+    def size(self) -> int:
+        return sum(e["size"] for e in self.entries())
+
+    def prune(
+        self,
+        max_bytes: Optional[int] = None,
+        older_than: Optional[float] = None,
+    ) -> List[Path]:
+        """Evict least recently used files until the cache fits in `max_bytes`.
+
+        `older_than` (seconds) also evicts every file unused for that long.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+
+        removed = []
+        with self._lock:
+            entries = self.entries()
+            total = sum(e["size"] for e in entries)
+            cutoff = time.time() - older_than if older_than is not None else None
+
+            for e in entries:
+                too_big = max_bytes is not None and total > max_bytes
+                too_old = cutoff is not None and e["used"] < cutoff
+                if not (too_big or too_old):
+                    continue
+                e["path"].unlink(missing_ok=True)
+                total -= e["size"]
+                removed.append(e["path"])
+
+        return removed
+
+    def clear(self) -> List[Path]:
+        return self.prune(max_bytes=0)
@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import Optional, Union
+
+import typer
+
+from agolutils.config.config import load_config
+
+from .attachments import AttachmentCache
+from .images import ImageCache
+from .responses import ResponseCache
+from .tokens import TokenCache
+
+app = typer.Typer()
+
+
+def _get_cache(
+    config: Optional[Path],
+    path: Optional[Path],
+    responses: bool = False,
+    images: bool = False,
+) -> Union[AttachmentCache, ImageCache, ResponseCache]:
+    if responses and images:
+        raise typer.BadParameter("pass only one of --responses and --images.")
+    cls = ResponseCache if responses else ImageCache if images else AttachmentCache
+    if path is not None:
+        return cls(path)
+
+    try:
+        cache = cls.from_config(load_config(config))
+    except FileNotFoundError:
+        cache = None
+    return cache or cls()
+
+
+@app.command()
+def info(
+    config: Optional[Path] = typer.Option(None, "--config", "-c"),
+    path: Optional[Path] = typer.Option(None, "--path"),
+    responses: bool = typer.Option(
+        False, "--responses", help="the query response cache instead."
+    ),
+    images: bool = typer.Option(
+        False, "--images", help="the rendered image cache instead."
+    ),
+):
+    """Show where the attachment cache, or with `--responses` the query
+    response cache or with `--images` the rendered image cache, is and how much
+    it holds.
+    """
+    cache = _get_cache(config, path, responses, images)
+    entries = cache.entries()
+    size_mb = sum(e["size"] for e in entries) / 1024 / 1024
+
+    typer.echo(f"path: {cache.path}")
+    typer.echo(f"files: {len(entries)}")
+    typer.echo(f"size: {size_mb:.1f} MB")
+    if cache.max_bytes:
+        typer.echo(f"max size: {cache.max_bytes / 1024 / 1024:.1f} MB")
+
+
+@app.command()
+def prune(
+    config: Optional[Path] = typer.Option(None, "--config", "-c"),
+    path: Optional[Path] = typer.Option(None, "--path"),
+    max_size_mb: Optional[float] = typer.Option(None, "--max-size-mb"),
+    older_than_days: Optional[float] = typer.Option(None, "--older-than-days"),
+    clear: bool = typer.Option(False, "--clear", help="remove every cached file."),
+    responses: bool = typer.Option(
+        False, "--responses", help="the query response cache instead."
+    ),
+    images: bool = typer.Option(
+        False, "--images", help="the rendered image cache instead."
+    ),
+):
+    """Evict least recently used files from the attachment cache, or with
+    `--responses` the query response cache or with `--images` the rendered
+    image cache.
+
+    $ agolutils cache prune --max-size-mb 500
+    $ agolutils cache prune --responses --clear
+    $ agolutils cache prune --images --older-than-days 30
+    """
+    cache = _get_cache(config, path, responses, images)
+
+    if clear:
+        removed = cache.clear()
+    else:
+        removed = cache.prune(
+            max_bytes=(
+                int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None
+            ),
+            older_than=(
+                older_than_days * 86400 if older_than_days is not None else None
+            ),
+        )
+
+    typer.echo(f"removed {len(removed)} file(s).")
+    return removed
+
+
+@app.command()
+def logout(
+    config: Optional[Path] = typer.Option(None, "--config", "-c"),
+    path: Optional[Path] = typer.Option(None, "--path"),
+):
+    """Remove the ArcGIS tokens saved by `token_cache`, so the next run logs in.
+
+    $ agolutils cache logout
+    """
+    if path is None:
+        try:
+            cache = TokenCache.from_config(load_config(config))
+        except FileNotFoundError:
+            cache = None
+        path = cache.path if cache else None
+
+    removed = TokenCache(path).clear()
+    typer.echo(f"removed {len(removed)} token(s).")
+    return removed
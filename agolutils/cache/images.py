@@ -0,0 +1,55 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .base import DiskCache, cache_settings
+
+# derivatives are small, but a new one is made whenever a context is fetched
+# again, so the cache is capped unless told otherwise.
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+IMAGE_SUFFIXES = (".jpg", ".png")
+
+
+class ImageCache(DiskCache):
+    """On-disk cache of the orientation-corrected, downscaled photos made by
+    `agolutils.render.images.prepare_image`, keyed by `image_key`.
+
+    Kept under `max_bytes` (1 GB by default) by evicting the least recently
+    used derivatives, since re-fetched contexts keep adding new ones.
+    """
+
+    name = "images"
+    env_var = "AGOLUTILS_IMAGE_CACHE_DIR"
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+    ):
+        super().__init__(path, max_bytes)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["ImageCache"]:
+        """From `docxtpl.image_cache`, which is on by default; `false` turns it
+        off and photos are rewritten in place instead.
+        """
+        cfg = cache_settings(config, "image_cache", default=True, section="docxtpl")
+        if cfg is None:
+            return None
+        max_bytes = cfg["max_bytes"]
+        return cls(
+            path=cfg.get("path"),
+            max_bytes=DEFAULT_MAX_BYTES if max_bytes is None else max_bytes,
+        )
+
+    def object_path(self, key: str, suffix: str) -> Path:
+        return self.path / key[:2] / (key + suffix)
+
+    def get(self, key: str) -> Optional[Path]:
+        """The cached derivative for `key`, or None on a miss."""
+        for suffix in IMAGE_SUFFIXES:
+            cached = self.object_path(key, suffix)
+            if cached.is_file():
+                self.touched(cached)
+                return cached
+        return None
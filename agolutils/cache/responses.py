@@ -0,0 +1,216 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from agolutils.io import dumps_json, loads_json
+
+from .base import DiskCache, cache_settings, temp_path
+
+
+class ResponseCacheMiss(KeyError):
+    """Raised in offline mode for a request that isn't in the cache."""
+
+
+def _last_edit_date(layer) -> Any:
+    info = layer.properties.get("editingInfo") or {}
+    return info.get("lastEditDate")
+
+
+def _encode(value) -> Optional[Dict[str, Any]]:
+    if hasattr(value, "to_dict"):
+        return {"featureset": value.to_dict()}
+    if isinstance(value, (dict, list)):
+        return {"json": value}
+    return None
+
+
+def _decode(payload: Dict[str, Any]):
+    if "featureset" in payload:
+        from arcgis.features import FeatureSet
+
+        return FeatureSet.from_dict(payload["featureset"])
+    return payload["json"]
+
+
+class ResponseCache(DiskCache):
+    """On-disk cache of `query`, `query_related_records` and
+    `attachments.get_list` responses, for re-running a pull without querying
+    the service again.
+
+    Responses are keyed by the layer url, the call and its arguments, and
+    saved with the layer's `editingInfo.lastEditDate`; a response saved before
+    the layer's last edit, or more than `ttl` seconds ago, is refetched. When
+    `max_bytes` is set the least recently used entries are evicted to keep the
+    cache under that size.
+
+    With `offline`, requests are only replayed from the cache, whatever their
+    age or edit date, and a request that isn't cached raises
+    `ResponseCacheMiss`, as does downloading an attachment; use an
+    `AttachmentCache` for the files. Only the queries are replayed: logging
+    in, looking up the item and reading layer properties still go to the
+    service, so offline still needs the network.
+
+    Wrap layers with `wrap` (`Survey123Service` does this given a cache).
+    """
+
+    name = "responses"
+    env_var = "AGOLUTILS_RESPONSE_CACHE_DIR"
+    pattern = "??/*.json"
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        offline: bool = False,
+    ):
+        super().__init__(path, max_bytes)
+        self.ttl = ttl
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["ResponseCache"]:
+        cfg = cache_settings(config, "response_cache")
+        if cfg is None:
+            return None
+        return cls(
+            path=cfg.get("path"),
+            ttl=cfg["ttl"],
+            max_bytes=cfg["max_bytes"],
+            offline=cfg.get("offline", False),
+        )
+
+    @staticmethod
+    def key(url: Any, method: str, *args, **kwargs) -> str:
+        raw = json.dumps([str(url), method, args, kwargs], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _object_path(self, key: str) -> Path:
+        return self.path / key[:2] / (key + ".json")
+
+    def get(self, key: str, edit_date: Any = None) -> Optional[Dict[str, Any]]:
+        """The cached payload for `key`, or None if missing, expired or saved
+        under another `edit_date`. Offline, any cached payload is returned.
+        """
+        cached = self._object_path(key)
+        try:
+            entry = loads_json(cached.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+        if not self.offline:
+            if self.ttl is not None and time.time() - entry["created"] > self.ttl:
+                return None
+            if entry.get("edit_date") != edit_date:
+                return None
+
+        self.touched(cached)
+        return entry["payload"]
+
+    def put(self, key: str, payload: Dict[str, Any], edit_date: Any = None) -> Path:
+        cached = self._object_path(key)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = {"created": time.time(), "edit_date": edit_date, "payload": payload}
+        tmp = temp_path(cached)
+        tmp.write_bytes(dumps_json(entry, compact=True))
+        tmp.replace(cached)
+
+        self.added()
+        return cached
+
+    def call(self, layer, method: str, fxn, *args, **kwargs):
+        """`fxn(*args, **kwargs)` through the cache, keyed as `layer.method`."""
+        return self._call(layer, [layer], method, fxn, args, kwargs)
+
+    def _call(self, layer, edited: List[Any], method: str, fxn, args, kwargs):
+        """`call`, refetching once any of the `edited` layers has been edited."""
+        url = getattr(layer, "url", None)
+        key = self.key(url, method, *args, **kwargs)
+
+        # offline, any saved response will do, so don't ask for the edit date.
+        edit_date = None
+        if not self.offline:
+            dates = [_last_edit_date(e) for e in edited]
+            edit_date = dates[0] if len(dates) == 1 else dates
+        payload = self.get(key, edit_date)
+        if payload is not None:
+            with self._lock:
+                self.hits += 1
+            return _decode(payload)
+
+        with self._lock:
+            self.misses += 1
+        if self.offline:
+            raise ResponseCacheMiss(f"{method} on {url} is not cached: {args} {kwargs}")
+
+        value = fxn(*args, **kwargs)
+        payload = _encode(value)
+        if payload is not None:
+            self.put(key, payload, edit_date)
+        return value
+
+    def wrap(self, layer) -> "CachedLayer":
+        if isinstance(layer, CachedLayer):
+            return layer
+        return CachedLayer(layer, self)
+
+
+class CachedLayer:
+    """A layer or table whose queries go through a `ResponseCache`. Everything
+    else, e.g. `properties` and `url`, is the wrapped layer's.
+
+    Adding a related record only changes the related table's edit date, so
+    `related_tables` maps relationship ids to their tables and related records
+    are refetched once either layer is edited. Relationships missing from it
+    only follow this layer's edits (and `ttl`).
+    """
+
+    def __init__(self, layer, cache: ResponseCache):
+        self._layer = layer
+        self._cache = cache
+        self.attachments = CachedAttachments(layer, cache)
+        self.related_tables: Dict[Any, Any] = {}
+
+    def __getattr__(self, name):
+        return getattr(self._layer, name)
+
+    def query(self, *args, **kwargs):
+        return self._cache.call(
+            self._layer, "query", self._layer.query, *args, **kwargs
+        )
+
+    def query_related_records(self, *args, **kwargs):
+        fxn = self._layer.query_related_records
+        rel_id = kwargs.get("relationship_id", args[1] if len(args) > 1 else None)
+        edited = [self._layer]
+        if rel_id in self.related_tables:
+            edited.append(self.related_tables[rel_id])
+        return self._cache._call(
+            self._layer, edited, "query_related_records", fxn, args, kwargs
+        )
+
+
+class CachedAttachments:
+    def __init__(self, layer, cache: ResponseCache):
+        self._layer = layer
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._layer.attachments, name)
+
+    def download(self, *args, **kwargs):
+        # files aren't cached here, see `AttachmentCache`; offline, don't fetch.
+        if self._cache.offline:
+            raise ResponseCacheMiss(f"not downloading attachments offline: {kwargs}")
+        return self._layer.attachments.download(*args, **kwargs)
+
+    def get_list(self, *args, **kwargs):
+        fxn = self._layer.attachments.get_list
+        return self._cache.call(
+            self._layer, "attachments.get_list", fxn, *args, **kwargs
+        )
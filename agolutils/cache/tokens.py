@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .base import cache_settings, default_cache_dir, temp_path
+
+# how long a token is kept when the server's expiry for it isn't known.
+DEFAULT_TTL = 50 * 60
+
+# don't hand out a token that expires within this many seconds. a GIS built
+# from a bare token can't renew it; `get_gis` logs in again with the password
+# once it expires, but a token that outlasts the run saves that login.
+DEFAULT_MIN_REMAINING = 15 * 60
+
+
+class TokenCache:
+    """ArcGIS tokens saved between runs, so back to back commands skip the login.
+
+    One file per (url, username) holding the token and when it expires; never
+    the password. The directory is created 0700 and the files 0600, and on
+    posix a file readable by anyone else is ignored. Tokens are kept until
+    the expiry the server reported for them, or for `DEFAULT_TTL` when that
+    isn't known; `ttl` (seconds) shortens that. Anyone who can read a token
+    can act as its user until it expires.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        ttl: Optional[float] = None,
+        min_remaining: float = DEFAULT_MIN_REMAINING,
+    ):
+        self.path = (
+            Path(path).expanduser()
+            if path
+            else default_cache_dir("tokens", "AGOLUTILS_TOKEN_CACHE_DIR")
+        )
+        self.ttl = ttl
+        self.min_remaining = min_remaining
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["TokenCache"]:
+        cfg = cache_settings(config, "token_cache")
+        if cfg is None:
+            return None
+        return cls(path=cfg.get("path"), ttl=cfg["ttl"])
+
+    @staticmethod
+    def key(url: Optional[str], username: str) -> str:
+        return hashlib.sha1(f"{url or ''}|{username}".encode()).hexdigest()
+
+    def _token_path(self, url: Optional[str], username: str) -> Path:
+        return self.path / (self.key(url, username) + ".json")
+
+    def get(self, url: Optional[str], username: str) -> Optional[str]:
+        """The cached token, or None if missing, expiring soon, or exposed."""
+        entry = self.entry(url, username)
+        return entry["token"] if entry else None
+
+    def entry(self, url: Optional[str], username: str) -> Optional[Dict[str, Any]]:
+        """The cached token and its `expires` (epoch seconds), as `get`."""
+        cached = self._token_path(url, username)
+        try:
+            if os.name == "posix" and cached.stat().st_mode & 0o077:
+                return None
+            entry = json.loads(cached.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires", 0) - time.time() < self.min_remaining:
+            return None
+        return entry if entry.get("token") else None
+
+    def put(
+        self,
+        url: Optional[str],
+        username: str,
+        token: str,
+        expires: Optional[float] = None,
+    ) -> Path:
+        """Save `token`, which the server said `expires` at (epoch seconds)."""
+        self.path.mkdir(parents=True, exist_ok=True, mode=0o700)
+        if os.name == "posix":
+            os.chmod(self.path, 0o700)
+
+        cached = self._token_path(url, username)
+        entry = {
+            "url": url,
+            "username": username,
+            "token": token,
+            "expires": self._expires(expires),
+        }
+
+        tmp = temp_path(cached)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        tmp.replace(cached)
+        return cached
+
+    def _expires(self, expires: Optional[float]) -> float:
+        now = time.time()
+        if expires is None:
+            expires = now + DEFAULT_TTL
+        if self.ttl is not None:
+            expires = min(expires, now + self.ttl)
+        return expires
+
+    def remove(self, url: Optional[str], username: str):
+        self._token_path(url, username).unlink(missing_ok=True)
+
+    def clear(self) -> List[Path]:
+        if not self.path.is_dir():
+            return []
+
+        removed = list(self.path.glob("*.json"))
+        for p in removed:
+            p.unlink(missing_ok=True)
+        return removed
@@ -1,12 +1,43 @@
-from typing import List
+from contextlib import ExitStack
+from pathlib import Path
+from typing import List, Optional
 
 import typer
 
-from agolutils import config, context, render
+from agolutils import cache, config, context, profiling, render
 from agolutils.utils import search_files
 
 app = typer.Typer()
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False, "--profile", help="time each stage and write a json report."
+    ),
+    profile_report: Path = typer.Option(
+        Path("agolutils-profile.json"),
+        "--profile-report",
+        help="where the --profile report is written.",
+    ),
+    cprofile: Optional[Path] = typer.Option(
+        None, "--cprofile", help="also dump cProfile stats here (implies --profile)."
+    ),
+):
+    # no docstring: typer would show it as the help for `agolutils` itself.
+    # e.g. agolutils --profile --profile-report run.json render-batch contexts/
+    if not (profile or cprofile):
+        return
+
+    stack = ExitStack()
+    stack.callback(typer.echo, f"profile written to {profile_report}", err=True)
+    stack.enter_context(profiling.profile_run(profile_report, cprofile_path=cprofile))
+    ctx.call_on_close(stack.close)
+
+
 app.add_typer(context.app, name="context")
+app.add_typer(cache.app, name="cache")
 app.registered_commands += (
     render.app.registered_commands + config.app.registered_commands
 )
@@ -3,7 +3,7 @@ from typing import Any, Dict, Optional, Union
 
 import typer
 
-from agolutils.io import load_yaml
+from agolutils.io import load_yaml_cached
 
 config_file = """## Default Project Configuration ##
 
@@ -20,6 +20,68 @@ connection:
 context_file_pattern: pc-gi-lid-inspections/contexts/{globalid}_editdate_{EditDate}/context.json
 report_file_pattern: pc-gi-lid-inspections/reports/pc-gi-lid-inspections_{globalid}_{EditDate}.docx
 
+# fetch related (repeat) records for this many surveys at a time instead of
+# querying each survey's related tables one record at a time.
+# relates_batch_size: 100
+
+# download attachments on this many threads, with at most
+# `download_workers_per_host` concurrent requests to any one server.
+# download_workers: 8
+# download_workers_per_host: 4
+
+# keep downloaded attachments in a local cache shared across runs so unchanged
+# photos are copied into new context directories instead of downloaded again.
+# `link: true` hard-links instead of copying when the filesystem allows it.
+# attachment_cache:
+#   path: ~/.cache/agolutils/attachments
+#   max_size_mb: 2048
+#   link: false
+
+# cache query, related records and attachment list responses on disk so a
+# re-run (e.g. while working on a template) doesn't go back to the service.
+# responses are refetched after `ttl_minutes` or once the layer is edited.
+# `offline: true` only replays cached responses, however old, and fails on
+# anything else, including attachment downloads, so pair it with
+# `attachment_cache`. logging in and reading the layers' properties still go
+# to the service, so offline still needs the network.
+# response_cache:
+#   path: ~/.cache/agolutils/responses
+#   ttl_minutes: 60
+#   max_size_mb: 512
+#   offline: false
+
+# keep the ArcGIS login token on disk (owner read/write only) so commands run
+# back to back reuse it instead of logging in again. tokens are dropped when
+# the server says they expire, or sooner with `ttl_minutes`, and the password
+# is used again once one expires or is rejected. `agolutils cache logout`
+# removes them.
+# token_cache:
+#   path: ~/.cache/agolutils/tokens
+#   ttl_minutes: 30
+
+# records are queried in chunks of at most the layer's maxRecordCount object ids;
+# request this many chunks concurrently.
+# query_workers: 4
+
+# contexts are built and written this many records at a time (default 50), so a
+# long fetch keeps memory bounded and leaves finished contexts on disk as it goes.
+# fetch_chunk_size: 50
+
+# how query results become context records. `fields` decodes them directly with
+# the layer's field schema; `pandas` goes through a DataFrame (slower fallback).
+# record_decoder: fields
+
+# how context files are written. `compact` drops the indentation and
+# `compression` (gzip or zstd) writes e.g. context.json.zst instead.
+# context_format:
+#   compact: false
+#   compression: zstd
+
+# store each layer's properties once per context, under `__layers`, with
+# records referring to them by `__layer_ref`, instead of on every record.
+# smaller contexts; they're expanded again before the plugin runs when rendering.
+# share_layer_properties: false
+
 # enter the timezone for report datetime stamp normalization.
 report_tz: US/Eastern
 
@@ -30,12 +92,19 @@ plugin: demo
 
 docxtpl:
   template_filepath: templates/template.docx
+  # photos are orientation-corrected and downscaled to their max size at `dpi`
+  # into this cache instead of being rewritten in place. it's kept under
+  # `max_size_mb` (1024 by default); set `image_cache: false` to disable.
+  # image_cache:
+  #   path: ~/.cache/agolutils/images
+  #   max_size_mb: 1024
   image:
     - key: images # list of dicts in context
       filepath_key: image_filepath # each dict in the `images` must contain a filepath key.
       max-width: 3
       max-height: 2
       units: inches # units of the max-width and height values. Allowed values are 'mm' and 'inches'.
+      dpi: 200 # resolution the photos are downscaled to for the report.
 
 """
 
@@ -50,7 +119,7 @@ def load_config(config: Optional[Union[Dict, str, Path]] = None) -> Dict[str, An
 
     elif isinstance(config, (str, Path)):
         path = Path(config).parent.resolve()
-        dct = load_yaml(config)
+        dct = load_yaml_cached(config)
         dct["__config_relpath"] = path
         return dct
 
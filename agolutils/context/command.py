@@ -1,13 +1,20 @@
-import json
+import sys
+from contextlib import ExitStack
 from pathlib import Path
 from typing import List, Optional
 
 import typer
 
 from agolutils.config.config import load_config_cli
-from agolutils.io import load_json
 from agolutils.utils import collect_files, make_path
 
+from .context import (
+    CONTEXT_SUFFIXES,
+    combine_contexts,
+    iter_jsonl,
+    write_json_stream,
+)
+
 app = typer.Typer()
 
 
@@ -22,21 +29,36 @@ def combine(
         allow_dash=True,
     ),
     output: Optional[Path] = typer.Option(None, "--output", "-o"),
+    recursive: bool = typer.Option(False, "--recursive", "-r"),
+    workers: int = typer.Option(1, "--workers", "-j"),
+    jsonl: bool = typer.Option(
+        False, "--jsonl", help="write each input as one json line instead of merging."
+    ),
 ):
-    files = collect_files(filepaths)
+    """Merge context files into one json object, or stream them as json lines.
+
+    $ agolutils context combine -r -j 8 contexts/ -o combined.json
+    """
+    files = collect_files(filepaths, recursive=recursive, suffixes=CONTEXT_SUFFIXES)
+
+    with ExitStack() as stack:
+        if output:
+            out = stack.enter_context(open(make_path(output), "wb"))
+        else:
+            out = sys.stdout.buffer
 
-    ctx = {}
+        if jsonl:
+            for line in iter_jsonl(files, max_workers=workers):
+                out.write(line)
+            out.flush()
+            return None
 
-    for file in files:
-        new_ctx = load_json(file)
-        ctx.update(new_ctx)
+        ctx = combine_contexts(files, max_workers=workers)
+        write_json_stream(ctx, out)
+        if not output:
+            out.write(b"\n")
+        out.flush()
 
-    content = json.dumps(ctx, indent=2)
-    if output:
-        output = make_path(output)
-        output.write_text(content)
-    else:
-        typer.echo(content)
     return ctx
 
 
@@ -52,3 +74,25 @@ def fetch_survey123(
     files = build_survey123_contexts(cfg, oids, env=env)
 
     return files
+
+
+@app.command()
+def sync_survey123(
+    config: Optional[Path] = typer.Option(None, "--config", "-c"),
+    env: Optional[Path] = typer.Option(".env", "--env"),
+    state_file: Optional[Path] = typer.Option(None, "--state-file"),
+    since: Optional[str] = typer.Option(
+        None, "--since", help="YYYY-MM-DD lower bound for the first sync."
+    ),
+):
+    """Fetch contexts for surveys edited since the last sync.
+
+    $ agolutils context sync-survey123 --config config.yml
+    """
+    from agolutils.arcgis.sync import sync_survey123_contexts
+
+    cfg = load_config_cli(config)
+    files = sync_survey123_contexts(cfg, env=env, state_file=state_file, since=since)
+    typer.echo(f"wrote {len(files)} context(s).")
+
+    return files
@@ -1,8 +1,14 @@
-import json
 from pathlib import Path
-from typing import Any, Dict, Union
+from typing import IO, Any, Dict, Iterable, Iterator, Optional, Union
 
-from agolutils.io import load_json
+from agolutils.io import (
+    COMPRESSION_SUFFIXES,
+    dumps_json,
+    load_json,
+    load_json_cached,
+    write_json,
+)
+from agolutils.utils import imap_bounded
 
 
 def load_context(context: Union[Dict, str, Path]) -> Dict[str, Any]:
@@ -11,20 +17,171 @@ def load_context(context: Union[Dict, str, Path]) -> Dict[str, Any]:
         return context
 
     relpath = Path(context).resolve().parent
-    dct = load_json(context)
+    dct = load_json_cached(context)
     dct["__context_relpath"] = relpath
     return dct
 
 
-def write_context(mapping: dict, outpath=None):
+LAYERS_KEY = "__layers"
+LAYER_REF_KEY = "__layer_ref"
+LAYER_PROPERTIES_KEY = "__layer_properties"
+
+
+def layer_ref(props: Dict[str, Any]) -> str:
+    return str(props.get("id", props.get("name")))
+
+
+def _layer_records(context: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield context
+    for relate in (context.get("relates") or {}).values():
+        yield relate
+        yield from relate.get("data") or []
+
+
+def share_layer_properties(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Store each layer's `__layer_properties` once, in `context["__layers"]`.
+
+    The parent, every relate and every related record then refer to their
+    layer by `__layer_ref` instead of carrying their own copy of the schema.
+    """
+    layers = context.setdefault(LAYERS_KEY, {})
+    for record in _layer_records(context):
+        props = record.pop(LAYER_PROPERTIES_KEY, None)
+        if props is not None:
+            ref = layer_ref(props)
+            layers.setdefault(ref, props)
+            record[LAYER_REF_KEY] = ref
+    return context
+
+
+def expand_layer_properties(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Undo `share_layer_properties` for templates that read
+    `__layer_properties` from each record. The layers aren't copied.
+    """
+    layers = context.get(LAYERS_KEY) or {}
+    for record in _layer_records(context):
+        ref = record.get(LAYER_REF_KEY)
+        if LAYER_PROPERTIES_KEY not in record and ref in layers:
+            record[LAYER_PROPERTIES_KEY] = layers[ref]
+    return context
+
+
+def resolve_layer_properties(
+    record: Dict[str, Any], layers: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """A record's layer properties, whether inline or referenced from `layers`."""
+    props = record.get(LAYER_PROPERTIES_KEY)
+    if props is None and layers:
+        props = layers.get(record.get(LAYER_REF_KEY))
+    return props
+
+
+def _shared_copy(context: Dict[str, Any]) -> Dict[str, Any]:
+    """`share_layer_properties` on a copy of the parts of `context` it edits."""
+    context = dict(context)
+    if LAYERS_KEY in context:
+        context[LAYERS_KEY] = dict(context[LAYERS_KEY] or {})
+
+    relates = context.get("relates")
+    if relates:
+        context["relates"] = {
+            name: (
+                {**relate, "data": [dict(r) for r in relate["data"]]}
+                if relate.get("data")
+                else dict(relate)
+            )
+            for name, relate in relates.items()
+        }
+    return share_layer_properties(context)
+
+
+def write_context(
+    mapping: dict,
+    outpath=None,
+    compact=False,
+    compression=None,
+    share_layer_properties=False,
+):
+    """Write a context as json; see `agolutils.io.write_json` for the options.
+
+    With `share_layer_properties` each layer's properties are written once,
+    under `__layers`, instead of on every record; `mapping` itself is left
+    as is. Rendering expands them again before the plugin runs.
+
+    Returns the path written, which has a '.gz' or '.zst' suffix appended when
+    compressed. `load_context` reads any of these formats.
+    """
+    if share_layer_properties:
+        mapping = _shared_copy(mapping)
+
     if outpath is None:
         outpath = "./context.json"
-    out_file = Path(outpath)
 
-    ctx = json.dumps(mapping, indent=2, default=str)
-    out_file.write_text(ctx)
+    return write_json(mapping, outpath, compact=compact, compression=compression)
+
+
+# context files as written by `write_context`, plain or compressed.
+CONTEXT_SUFFIXES = tuple(".json" + s for s in ["", *COMPRESSION_SUFFIXES.values()])
+
+
+def find_context_file(path: Union[str, Path]) -> Optional[Path]:
+    """The context at `path`, or its compressed variant, if either exists."""
+    path = Path(path)
+    for suffix in ["", *COMPRESSION_SUFFIXES.values()]:
+        candidate = path.with_name(path.name + suffix)
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def combine_contexts(files: Iterable[Union[str, Path]], max_workers=1) -> Dict:
+    """Merge context files with `dict.update`, later files winning.
+
+    Files are read on `max_workers` threads, which overlaps the file reads; they
+    are merged in the order given.
+    """
+    ctx = {}
+    for new_ctx in imap_bounded(load_json, files, max_workers=max_workers):
+        ctx.update(new_ctx)
+    return ctx
+
+
+def _jsonl_line(file) -> bytes:
+    return dumps_json(load_json(file), compact=True) + b"\n"
+
+
+def iter_jsonl(files: Iterable[Union[str, Path]], max_workers=1) -> Iterator[bytes]:
+    """Yield each context file as one compact json line, in order.
+
+    With `max_workers` > 1 the files are parsed and re-encoded in that many
+    processes, so only the encoded bytes travel back to this one.
+    """
+    files = list(files)
+    if max_workers <= 1:
+        yield from map(_jsonl_line, files)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(_jsonl_line, files, chunksize=16)
+
+
+def write_json_stream(obj: Dict, out: IO[bytes]):
+    """Write `obj` as indented json one top-level key at a time, so the whole
+    document is never held as a single string.
+    """
+    if not obj:
+        out.write(b"{}")
+        return
 
-    return out_file
+    out.write(b"{")
+    for i, (key, value) in enumerate(obj.items()):
+        out.write(b",\n  " if i else b"\n  ")
+        out.write(dumps_json(str(key)) + b": ")
+        # json strings can't contain raw newlines, so this only indents lines.
+        out.write(dumps_json(value).replace(b"\n", b"\n  "))
+    out.write(b"\n}")
 
 
 def load_context_cli(context: Union[str, Path]) -> Dict[str, Any]:
@@ -44,11 +44,32 @@ def resolve_paths(input_path, output_path) -> Tuple[List[Path], List[Path]]:
     return input_path, output_path
 
 
-def convert(input_path, output_path=None, word=None):
+def convert(input_path, output_path=None, word=None, workers=1, update_fields=False):
+    """Save Word documents as pdfs.
+
+    With `workers` > 1 the documents are spread over that many Word instances,
+    see `msword.WordPool`. `update_fields` refreshes fields (TOC, page refs...)
+    before exporting, in the same open of each document.
+    """
     inps, outs = resolve_paths(input_path, output_path)
     if sys.platform == "win32":
-        from .msword import save_as_pdf
+        from .msword import (
+            save_as_pdf,
+            save_as_pdf_pooled,
+            update_fields_and_save_as_pdf,
+        )
+
+        if workers > 1 and word is None:
+            results = save_as_pdf_pooled(
+                inps, outs, workers=workers, update_fields=update_fields
+            )
+            failed = [f"{r.input}: {r.error}" for r in results if not r.ok]
+            if failed:
+                raise RuntimeError("failed to convert:\n" + "\n".join(failed))
+            return outs
 
+        if update_fields:
+            return update_fields_and_save_as_pdf(inps, outs, word=word)
         return save_as_pdf(inps, outs, word=word)
     else:
         raise NotImplementedError("Not implemented for linux or darwin systems.")
@@ -1,15 +1,288 @@
+import datetime
+import gzip
+import importlib
 import json
+import marshal
+import math
+import threading
+from collections import OrderedDict
+from pathlib import Path
 
-import yaml
+# optional accelerators, imported on first use (see `_optional`) so that
+# importing agolutils, and so starting the cli, doesn't pay for them.
+OPTIONAL_MODULES = ("orjson", "msgspec", "zstandard")
+_optional_modules = {}
+
+
+def _optional(name):
+    """The optional module `name`, or None if it isn't installed."""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:  # pragma: no cover
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+def __getattr__(name):
+    # keeps `from agolutils.io import zstandard` working.
+    if name in OPTIONAL_MODULES:
+        return _optional(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def json_backends():
+    """The json backends available here, fastest first."""
+    backends = []
+    if _optional("orjson") is not None:
+        backends.append("orjson")
+    if _optional("msgspec") is not None:
+        backends.append("msgspec")
+    backends.append("json")
+    return backends
+
+
+def _json_default(obj):
+    """`default` for every backend, so they all write the same json as msgspec
+    does natively: datetimes in ISO 8601 with "Z" for UTC, numpy scalars as
+    their python value, sets as lists, and anything else with `str`.
+    """
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        text = obj.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if type(obj).__module__ == "numpy" and hasattr(obj, "item"):
+        value = obj.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    return str(obj)
+
+
+def _finite(obj):
+    """`obj` with NaN and infinite floats as None, as the fast backends write
+    them, for `json`, which would write the non-standard `NaN` tokens.
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def dumps_json(obj, compact=False, backend=None) -> bytes:
+    """Serialize `obj` to json bytes with the fastest available backend.
+
+    Every backend writes the same bytes: UTF-8, NaN and infinities as null,
+    datetimes in ISO 8601 and anything else json can't represent with `str`
+    (see `_json_default`). `compact` drops the indentation. `backend` forces
+    one of `json_backends()`.
+    """
+    backend = backend or json_backends()[0]
+
+    if backend == "orjson":
+        orjson = _optional("orjson")
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_json_default, option=option)
+
+    if backend == "msgspec":
+        msgspec = _optional("msgspec")
+        data = msgspec.json.encode(obj, enc_hook=_json_default)
+        return data if compact else msgspec.json.format(data, indent=2)
+
+    if backend == "json":
+        options = {"default": _json_default, "ensure_ascii": False}
+        if compact:
+            options["separators"] = (",", ":")
+        else:
+            options["indent"] = 2
+        return json.dumps(_finite(obj), **options).encode()
+
+    raise ValueError(f"unknown json backend: {backend!r}")
+
+
+def loads_json(data: bytes):
+    # the fast decoders reject the NaN/Infinity tokens `json.dump` writes, so
+    # fall back to `json` for files like that rather than fail to read them.
+    try:
+        orjson = _optional("orjson")
+        if orjson is not None:
+            return orjson.loads(data)
+        msgspec = _optional("msgspec")
+        if msgspec is not None:
+            return msgspec.json.decode(data)
+    except ValueError:
+        pass
+    return json.loads(data)
+
+
+def compress(data: bytes, compression=None) -> bytes:
+    if not compression:
+        return data
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        zstandard = _optional("zstandard")
+        if zstandard is None:
+            raise ImportError("zstd compression requires the `zstandard` package.")
+        return zstandard.ZstdCompressor().compress(data)
+    raise ValueError(f"unknown compression: {compression!r}")
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompress gzip or zstd data, detected by its magic bytes."""
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        zstandard = _optional("zstandard")
+        if zstandard is None:
+            raise ImportError("reading zstd files requires the `zstandard` package.")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
 
 
 def load_yaml(filepath):
+    import yaml
+
     with open(filepath) as f:
         contents = yaml.safe_load(f)
     return contents
 
 
 def load_json(filepath):
-    with open(filepath) as f:
-        contents = json.load(f)
+    """Load a json file, which may be gzip or zstd compressed."""
+    with open(filepath, "rb") as f:
+        contents = loads_json(decompress(f.read()))
     return contents
+
+
+def write_json(obj, filepath, compact=False, compression=None, backend=None) -> Path:
+    """Write `obj` as json to `filepath`, compressed if `compression` is 'gzip'
+    or 'zstd', in which case the matching suffix is appended to the filename.
+    """
+    path = Path(filepath)
+    if compression:
+        path = path.with_name(path.name + COMPRESSION_SUFFIXES[compression])
+
+    data = compress(dumps_json(obj, compact=compact, backend=backend), compression)
+    path.write_bytes(data)
+
+    return path
+
+
+def copy_data(obj):
+    """Copy parsed yaml/json data; much cheaper than `copy.deepcopy` since only
+    dicts and lists are mutable in it.
+    """
+    if isinstance(obj, dict):
+        return {k: copy_data(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [copy_data(v) for v in obj]
+    return obj
+
+
+def _identity(obj):
+    return obj
+
+
+class CachedLoader:
+    """Memoize a file loader by resolved path, mtime and size.
+
+    Repeat loads of an unchanged file return a copy of the first parse, so
+    callers are free to mutate what they get back. A changed file is parsed
+    again. `hits` and `misses` count how often the cache was used.
+
+    `freeze` turns a parse into what is stored and `thaw` makes the copy handed
+    back on each load.
+
+    At most `maxsize` files are kept and, with `max_bytes`, at most that many
+    bytes of them (the stored bytes, or the file size for other entries); the
+    least recently loaded are dropped first and a file bigger than `max_bytes`
+    isn't kept at all.
+    """
+
+    def __init__(
+        self, loader, maxsize=256, max_bytes=None, freeze=_identity, thaw=copy_data
+    ):
+        self.loader = loader
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.freeze = freeze
+        self.thaw = thaw
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, filepath):
+        path = Path(filepath).resolve()
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is not None and cached[0] == stamp:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                return self.thaw(cached[1])
+            self.misses += 1
+
+        contents = self.loader(path)
+        frozen = self.freeze(contents)
+        nbytes = len(frozen) if isinstance(frozen, bytes) else st.st_size
+
+        with self._lock:
+            old = self._cache.pop(path, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if self.max_bytes is None or nbytes <= self.max_bytes:
+                self._cache[path] = (stamp, frozen, nbytes)
+                self._bytes += nbytes
+            while len(self._cache) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._bytes -= self._cache.popitem(last=False)[1][2]
+
+        # hand back the parse itself unless it is also what was stored.
+        return self.thaw(frozen) if frozen is contents else contents
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "bytes": self._bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+load_yaml_cached = CachedLoader(load_yaml)
+
+# json parses about as fast as a python-level copy, so keep contexts as marshal
+# bytes, which load a little faster than json and skip the file read. bounded by
+# size since a batch render loads each (possibly multi-MB) context only once.
+load_json_cached = CachedLoader(
+    load_json, max_bytes=64 * 1024 * 1024, freeze=marshal.dumps, thaw=marshal.loads
+)
+
+
+def loader_cache_info():
+    return {"yaml": load_yaml_cached.info(), "json": load_json_cached.info()}
@@ -1,10 +1,67 @@
+import itertools
+import multiprocessing
+import queue
+import random
 import sys
 import time
+from collections import Counter, deque
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol
+
+from agolutils import profiling
 
 if sys.platform == "win32":
     import win32com.client
-    from pywintypes import com_error
+
+
+class WordApplication(Protocol):
+    """The part of the `Word.Application` COM object used here.
+
+    `Documents.Open(path)` must return a document supporting `Fields.Update()`,
+    `Save()`, `SaveAs(path, FileFormat=...)` and `Close(0)`. Anything with this
+    shape can stand in for Word, e.g. a fake client to exercise the pool and
+    retry logic on Linux.
+    """
+
+    Documents: Any
+
+    def Quit(self) -> Any: ...
+
+
+def is_call_rejected(e: BaseException) -> bool:
+    """Whether `e` is Word's transient "call was rejected by callee" error."""
+    message = getattr(e, "strerror", None) or str(e)
+    return "rejected by callee" in str(message).lower()
+
+
+def call_with_retry(
+    fxn: Callable,
+    *args,
+    timeout: float = 60.0,
+    base_delay: float = 0.05,
+    max_delay: float = 2.0,
+    **kwargs,
+):
+    """Call `fxn`, retrying while Word rejects the call because it's busy.
+
+    Waits grow exponentially from `base_delay` up to `max_delay`, with full
+    jitter so several Word instances don't retry in lockstep. The last error is
+    raised once `timeout` seconds have passed.
+    """
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        try:
+            return fxn(*args, **kwargs)
+        except Exception as e:
+            if not is_call_rejected(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+            if time.monotonic() + delay > deadline:
+                raise
+            time.sleep(delay)
+            attempt += 1
 
 
 class WordDocument:
@@ -22,36 +79,33 @@ class WordDocument:
             return self.doc.__getitem__(item)
 
     def __enter__(self):
-        self.doc = self.client.Documents.Open(self.filepath)
+        with profiling.span("word_open"):
+            self.doc = self.client.Documents.Open(self.filepath)
         return self.doc
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
         if self.doc is None:
             return
 
-        retry_delay_seconds = 0.25
-        retry_n_times = int(60 / retry_delay_seconds)
-        for _ in range(retry_n_times):
-            try:
-                self.doc.Close(0)
-            except com_error as e:
-                if "rejected by callee" in e.strerror.lower():  # type: ignore
-                    time.sleep(retry_delay_seconds)
-                    continue
-                raise
-
-            break
+        with profiling.span("word_close"):
+            call_with_retry(self.doc.Close, 0)
 
 
 def get_Word():
     app = "Word.Application"
 
-    word = win32com.client.DispatchEx(app)
-    word.Visible = False
+    with profiling.span("word_start"):
+        word = win32com.client.DispatchEx(app)
+        word.Visible = False
 
     return word
 
 
+def _update_and_save(doc):
+    doc.Fields.Update()
+    doc.Save()
+
+
 def update_fields(input_paths: list[Path], word=None):
     got_our_own_word = False
     if word is None:
@@ -60,19 +114,8 @@ def update_fields(input_paths: list[Path], word=None):
 
     try:
         for docx_inp in input_paths:
-            with WordDocument(word, docx_inp) as doc:
-                retry_delay_seconds = 0.25
-                retry_n_times = int(60 / retry_delay_seconds)
-                for _ in range(retry_n_times):
-                    try:
-                        doc.Fields.Update()
-                        doc.Save()
-                    except com_error as e:
-                        if "rejected by callee" in e.strerror.lower():  # type: ignore
-                            time.sleep(retry_delay_seconds)
-                            continue
-                        raise
-                    break
+            with WordDocument(word, docx_inp) as doc, profiling.span("update_fields"):
+                call_with_retry(_update_and_save, doc)
     finally:
         if got_our_own_word:
             word.Quit()
@@ -91,22 +134,260 @@ def save_as_pdf(
 
     try:
         for docx_inp, pdf_out in zip(input_paths, output_paths, strict=False):
-            with WordDocument(word, docx_inp) as doc:
-                retry_delay_seconds = 0.25
-                retry_n_times = int(60 / retry_delay_seconds)
-                for _ in range(retry_n_times):
-                    try:
-                        doc.SaveAs(str(pdf_out), FileFormat=wdFormatPDF)
-                    except com_error as e:
-                        if "rejected by callee" in e.strerror.lower():  # type: ignore
-                            time.sleep(retry_delay_seconds)
-                            continue
-                        raise
-
-                    break
+            with WordDocument(word, docx_inp) as doc, profiling.span("pdf_export"):
+                call_with_retry(doc.SaveAs, str(pdf_out), FileFormat=wdFormatPDF)
 
     finally:
         if got_our_own_word:
             word.Quit()
 
     return output_paths
+
+
+def _update_and_export(doc, pdf_out, file_format):
+    doc.Fields.Update()
+    doc.SaveAs(pdf_out, FileFormat=file_format)
+
+
+def update_fields_and_save_as_pdf(
+    input_paths: list[Path], output_paths: list[Path], word=None
+) -> list[Path]:
+    """Refresh fields (TOC, page refs...) and export to pdf in one open.
+
+    This replaces `update_fields` followed by `save_as_pdf`: each document is
+    opened once, and the .docx on disk is left untouched since the updated
+    fields only need to exist in the pdf.
+    """
+    got_our_own_word = False
+    if word is None:
+        word = get_Word()
+        got_our_own_word = True
+    wdFormatPDF = 17
+
+    try:
+        for docx_inp, pdf_out in zip(input_paths, output_paths, strict=False):
+            with WordDocument(word, docx_inp) as doc, profiling.span("pdf_export"):
+                call_with_retry(_update_and_export, doc, str(pdf_out), wdFormatPDF)
+
+    finally:
+        if got_our_own_word:
+            word.Quit()
+
+    return output_paths
+
+
+## Worker Pool
+OPERATIONS: Dict[str, Callable] = {
+    "pdf": lambda word, inp, out: save_as_pdf([inp], [out], word=word),
+    "update_fields": lambda word, inp, out: update_fields([inp], word=word),
+    "update_fields_pdf": lambda word, inp, out: update_fields_and_save_as_pdf(
+        [inp], [out], word=word
+    ),
+}
+
+
+@dataclass
+class ConversionResult:
+    input: Path
+    output: Optional[Path] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _pool_worker(worker_id, tasks, results, word_factory):
+    word = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            task_id, operation, inp, out = task
+            try:
+                if word is None:
+                    word = word_factory()
+                OPERATIONS[operation](word, inp, out)
+            except Exception as e:
+                results.put(("failed", worker_id, task_id, repr(e)))
+                continue
+            results.put(("done", worker_id, task_id, None))
+    finally:
+        if word is not None:
+            word.Quit()
+
+
+class WordPool:
+    """Run Word operations on `workers` processes, each with its own Word.
+
+    Each worker is handed one document at a time as it frees up, so a slow
+    document only holds up its own worker. A worker that spends longer than
+    `task_timeout` seconds on one document (counted from when it was handed
+    out), or that dies, is terminated and replaced, and its document is
+    retried up to `retries` times before being reported as failed.
+
+    `word_factory` creates the Word application in each worker and must be
+    picklable; it defaults to `get_Word`. Note that terminating a hung worker
+    can leave its Word process behind.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        word_factory: Callable[[], WordApplication] = get_Word,
+        task_timeout: float = 300.0,
+        retries: int = 1,
+        poll_interval: float = 0.5,
+    ):
+        self.workers = workers
+        self.word_factory = word_factory
+        self.task_timeout = task_timeout
+        self.retries = retries
+        self.poll_interval = poll_interval
+        self._mp = multiprocessing.get_context("spawn")
+
+    def _start(self, worker_id, results):
+        tasks = self._mp.Queue()
+        proc = self._mp.Process(
+            target=_pool_worker,
+            args=(worker_id, tasks, results, self.word_factory),
+            daemon=True,
+        )
+        proc.start()
+        return proc, tasks
+
+    def run(
+        self,
+        operation: str,
+        input_paths: List[Path],
+        output_paths: Optional[List[Path]] = None,
+    ) -> List[ConversionResult]:
+        output_paths = output_paths or list(input_paths)
+        jobs = [
+            (i, operation, Path(inp), Path(out))
+            for i, (inp, out) in enumerate(zip(input_paths, output_paths, strict=True))
+        ]
+        if not jobs:
+            return []
+
+        with profiling.span("word_pool"):
+            return self._run(jobs)
+
+    def _run(self, jobs) -> List[ConversionResult]:
+        messages = self._mp.Queue()
+        state = _PoolState(jobs)
+        n_workers = max(1, min(self.workers, len(jobs)))
+        # never reused, so a message from a replaced worker can't be taken for
+        # its replacement's.
+        worker_ids = itertools.count()
+        workers: Dict[int, tuple] = {}
+        try:
+            while state.outstanding:
+                while state.pending and len(workers) < n_workers:
+                    worker_id = next(worker_ids)
+                    workers[worker_id] = self._start(worker_id, messages)
+
+                for worker_id, (_, tasks) in workers.items():
+                    if worker_id not in state.assigned and state.pending:
+                        tasks.put(state.dispatch(worker_id))
+
+                try:
+                    state.handle(*messages.get(timeout=self.poll_interval))
+                except queue.Empty:
+                    pass
+
+                for worker_id, (proc, _) in list(workers.items()):
+                    hung = state.elapsed(worker_id) > self.task_timeout
+                    if hung or not proc.is_alive():
+                        proc.terminate()
+                        proc.join()
+                        del workers[worker_id]
+                        state.abandon(worker_id, hung, self.retries)
+        finally:
+            self._stop(workers)
+
+        return state.results
+
+    @staticmethod
+    def _stop(workers):
+        for _, tasks in workers.values():
+            tasks.put(None)
+        for proc, _ in workers.values():
+            proc.join(timeout=30)
+            if proc.is_alive():
+                proc.terminate()
+
+
+class _PoolState:
+    """Bookkeeping for one `WordPool.run`: which tasks are waiting and which
+    worker each of the others was handed to.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.results = [ConversionResult(job[2]) for job in jobs]
+        self.outstanding = set(range(len(jobs)))
+        self.pending = deque(range(len(jobs)))
+        self.attempts: Counter = Counter()
+        self.assigned: Dict[int, tuple] = {}
+
+    def dispatch(self, worker_id):
+        """Hand the next waiting task to `worker_id` and return its job."""
+        task_id = self.pending.popleft()
+        self.attempts[task_id] += 1
+        self.assigned[worker_id] = (task_id, time.monotonic())
+        return self.jobs[task_id]
+
+    def handle(self, kind, worker_id, task_id, error):
+        current = self.assigned.get(worker_id)
+        if current is None or current[0] != task_id:
+            # e.g. a late result from a worker that was already replaced.
+            return
+        del self.assigned[worker_id]
+        self.finish(task_id, error)
+
+    def elapsed(self, worker_id) -> float:
+        current = self.assigned.get(worker_id)
+        return 0.0 if current is None else time.monotonic() - current[1]
+
+    def finish(self, task_id, error=None):
+        self.outstanding.discard(task_id)
+        result = self.results[task_id]
+        result.attempts = self.attempts[task_id]
+        if error is None:
+            result.output = self.jobs[task_id][3]
+        else:
+            result.error = error
+
+    def abandon(self, worker_id, hung, retries):
+        """Drop the task of a replaced worker, queueing it again if retried."""
+        current = self.assigned.pop(worker_id, None)
+        if current is None:
+            return
+
+        task_id = current[0]
+        if self.attempts[task_id] <= retries:
+            self.pending.appendleft(task_id)
+            return
+
+        reason = "timed out" if hung else "worker died"
+        self.finish(task_id, f"{reason} after {self.attempts[task_id]} attempts")
+
+
+def save_as_pdf_pooled(
+    input_paths: list[Path],
+    output_paths: list[Path],
+    workers: int = 2,
+    update_fields: bool = False,
+    **kwargs,
+) -> List[ConversionResult]:
+    """`save_as_pdf` across a `WordPool`; kwargs are passed to the pool.
+
+    With `update_fields`, fields are refreshed in the same open, as with
+    `update_fields_and_save_as_pdf`.
+    """
+    operation = "update_fields_pdf" if update_fields else "pdf"
+    return WordPool(workers=workers, **kwargs).run(operation, input_paths, output_paths)
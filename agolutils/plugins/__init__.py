@@ -7,4 +7,9 @@ dictionary (e.g., contents of config.yml as a dict).
 This function must return a context dictionary which will be passed to the
 template rendering engine to produce the report.
 
+Plugins may also define a `setup` function that takes the `config` dictionary.
+It runs once when the plugin is loaded (or reloaded because its file changed)
+rather than once per report, so it's the place for expensive one-time work such
+as loading lookup tables.
+
 """
@@ -0,0 +1,172 @@
+"""Stage timings and counters for a run, off unless a profile is active.
+
+Code marks its stages with `span("name")` and its tallies with `count("name")`.
+Both do nothing until `enable()` (or `profile_run`) installs a `Profiler`, which
+then adds up wall time and calls per stage and writes them, with the counters
+and peak memory, as a json report:
+
+    with profile_run("profile.json", cprofile_path="run.prof"):
+        build_survey123_contexts(...)
+
+Spans in threads add to the same stage, so a stage's time can exceed the run's
+wall time. Worker processes (e.g. `render-batch --workers`) aren't included.
+"""
+
+import datetime
+import functools
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+class Profiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+                stage["seconds"] += elapsed
+                stage["calls"] += 1
+
+    def count(self, name: str, n: Union[int, float] = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {"seconds": round(s["seconds"], 6), "calls": s["calls"]}
+                for name, s in sorted(
+                    self.stages.items(), key=lambda kv: -kv[1]["seconds"]
+                )
+            }
+            counters = dict(self.counters)
+
+        return {
+            "started": self.started_at.isoformat(),
+            "wall_seconds": round(time.perf_counter() - self.started, 6),
+            "peak_memory_bytes": peak_memory_bytes(),
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def write(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2))
+        return path
+
+
+def peak_memory_bytes() -> Optional[int]:
+    """Peak resident memory of this process, or, where that isn't available
+    (Windows), peak Python allocations if `tracemalloc` is tracing.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    import tracemalloc
+
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    return None
+
+
+_profiler: Optional[Profiler] = None
+
+
+def enable() -> Profiler:
+    global _profiler
+    _profiler = Profiler()
+    if resource is None:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    return _profiler
+
+
+def disable() -> Optional[Profiler]:
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _profiler
+
+
+def span(name: str):
+    """Time a stage when profiling, e.g. `with span("query_records"): ...`."""
+    profiler = _profiler
+    if profiler is None:
+        return nullcontext()
+    return profiler.span(name)
+
+
+def count(name: str, n: Union[int, float] = 1):
+    profiler = _profiler
+    if profiler is not None:
+        profiler.count(name, n)
+
+
+def profiled(name: str):
+    """Decorator form of `span`."""
+
+    def decorator(fxn):
+        @functools.wraps(fxn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fxn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def profile_run(
+    report_path: Optional[Union[str, Path]] = None,
+    cprofile_path: Optional[Union[str, Path]] = None,
+):
+    """Profile the enclosed block, then write the json report to `report_path`
+    and, if given, a cProfile dump (for `pstats`/snakeviz) to `cprofile_path`.
+    """
+    profiler = enable()
+    cprof = None
+    if cprofile_path:
+        import cProfile
+
+        cprof = cProfile.Profile()
+        cprof.enable()
+    try:
+        yield profiler
+    finally:
+        if cprof is not None:
+            cprof.disable()
+            cprof.dump_stats(str(cprofile_path))
+        disable()
+        if report_path is not None:
+            profiler.write(report_path)
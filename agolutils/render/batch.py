@@ -0,0 +1,107 @@
+import glob
+import os
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from agolutils.config.config import load_config
+from agolutils.io import COMPRESSION_SUFFIXES
+from agolutils.utils import plugins
+
+DEFAULT_CONTEXT_GLOB = "**/context.json"
+
+
+@dataclass
+class RenderResult:
+    context: Path
+    report: Optional[Path] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def collect_contexts(
+    paths: Iterable[Union[str, Path]], pattern: str = DEFAULT_CONTEXT_GLOB
+) -> List[Path]:
+    """Resolve directories (searched with `pattern`, and its compressed variants,
+    e.g. context.json.zst), files and globs into a sorted, de-duplicated list of
+    context files.
+    """
+    found = set()
+    for p in paths:
+        path = Path(p)
+        if path.is_dir():
+            for suffix in ["", *COMPRESSION_SUFFIXES.values()]:
+                found.update(path.glob(pattern + suffix))
+        elif path.is_file():
+            found.add(path)
+        else:
+            # `glob.glob` rather than `Path.glob`, which rejects absolute patterns.
+            found.update(map(Path, glob.glob(str(p), recursive=True)))
+    return sorted(f.resolve() for f in found if f.is_file())
+
+
+def _render_one(context, config, template) -> RenderResult:
+    from .render import render_docx_template
+
+    start = time.perf_counter()
+    try:
+        report = render_docx_template(context, config, template)
+        return RenderResult(
+            Path(context), report=report, seconds=time.perf_counter() - start
+        )
+    except Exception as e:
+        return RenderResult(
+            Path(context),
+            error="".join(traceback.format_exception_only(type(e), e)).strip(),
+            seconds=time.perf_counter() - start,
+        )
+
+
+def render_batch(
+    contexts: Iterable[Union[str, Path]],
+    config: Optional[Union[Dict[str, Any], str, Path]] = None,
+    template: Optional[Union[str, Path]] = None,
+    max_workers: Optional[int] = None,
+) -> List[RenderResult]:
+    """Render a report for every context file on a pool of processes.
+
+    Each report is named by the config's `report_file_pattern`, as with
+    `render_docx_template`. A failure is captured on that item's result instead
+    of stopping the batch. Results are returned in the order of `contexts`.
+    `max_workers` defaults to the number of CPUs; 1 renders in this process.
+    The plugin's optional `setup(config)` runs once per worker process.
+    """
+    config = load_config(config)
+    if not config.get("report_file_pattern"):
+        raise ValueError(
+            "`report_file_pattern` is required in the config to render a batch."
+        )
+
+    contexts = [Path(c) for c in contexts]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if max_workers == 1 or len(contexts) <= 1:
+        # start the batch with a fresh plugin so its `setup` runs for this batch.
+        plugins.clear()
+        return [_render_one(c, config, template) for c in contexts]
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(contexts))) as pool:
+        futures = {pool.submit(_render_one, c, config, template): c for c in contexts}
+        for future in as_completed(futures):
+            context = futures[future]
+            try:
+                results[context] = future.result()
+            except Exception as e:
+                # the worker process itself died, e.g. killed or out of memory.
+                results[context] = RenderResult(context, error=repr(e))
+
+    return [results[c] for c in contexts]
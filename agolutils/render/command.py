@@ -1,12 +1,13 @@
+import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 
 from agolutils.config.config import load_config_cli
 from agolutils.context.context import load_context_cli
 
-from .render import render_docx_template
+from .batch import DEFAULT_CONTEXT_GLOB, collect_contexts
 
 app = typer.Typer()
 
@@ -23,7 +24,49 @@ def render_docx(
         --docxtpl template.docx --output report.docx
     """
 
+    from .render import render_docx_template
+
     cfg = load_config_cli(config)
     ctx = load_context_cli(context)
 
     return render_docx_template(ctx, cfg, docx_template, report_file=output)
+
+
+@app.command("render-batch")
+def render_batch_docx(
+    paths: List[str] = typer.Argument(..., help="context files, directories or globs"),
+    docx_template: Optional[Path] = typer.Option(None, "--docxtpl"),
+    config: Optional[Path] = typer.Option(None, "--config", "-c"),
+    workers: Optional[int] = typer.Option(None, "--workers", "-j"),
+    pattern: str = typer.Option(
+        DEFAULT_CONTEXT_GLOB, "--pattern", help="glob for contexts in directories"
+    ),
+):
+    """
+    >>> agolutils render-batch --config config.yml contexts/ --workers 4
+    """
+
+    from .batch import render_batch
+
+    cfg = load_config_cli(config)
+    contexts = collect_contexts(paths, pattern=pattern)
+    if not contexts:
+        typer.echo("No contexts found.")
+        raise typer.Exit(1)
+
+    start = time.perf_counter()
+    results = render_batch(contexts, cfg, docx_template, max_workers=workers)
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        typer.echo(typer.style(f"FAILED {r.context}: {r.error}", fg=typer.colors.RED))
+
+    typer.echo(
+        f"rendered {len(results) - len(failed)} of {len(results)} reports "
+        f"in {elapsed:.1f}s ({len(failed)} failed)."
+    )
+    if failed:
+        raise typer.Exit(1)
+
+    return results
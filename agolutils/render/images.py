@@ -0,0 +1,109 @@
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from PIL import Image, ImageOps
+
+from agolutils.cache.base import temp_path
+from agolutils.cache.images import ImageCache
+
+DEFAULT_DPI = 200
+MM_PER_INCH = 25.4
+
+# `ImageCache`s by (path, max_bytes), shared by every render in this process so
+# their write counts, and so how often they're pruned, carry across reports.
+_caches: Dict[Tuple[Path, Optional[int]], ImageCache] = {}
+_caches_lock = threading.Lock()
+
+
+def image_cache(config: Dict[str, Any]) -> Optional[ImageCache]:
+    """The `ImageCache` for `docxtpl.image_cache`, or None if it's disabled.
+
+    The cache is on by default; `image_cache: false` restores rewriting the
+    original files in place.
+    """
+    cache = ImageCache.from_config(config)
+    if cache is None:
+        return None
+    with _caches_lock:
+        return _caches.setdefault((cache.path, cache.max_bytes), cache)
+
+
+def to_inches(value: Optional[float], units: str) -> Optional[float]:
+    if not value:
+        return None
+    if units.lower() in ("millimeters", "millimeter", "mm"):
+        return value / MM_PER_INCH
+    return value
+
+
+def image_key(
+    path: Union[str, Path],
+    max_width: Optional[float],
+    max_height: Optional[float],
+    dpi: int,
+) -> str:
+    # stat rather than hash the source, which would read every photo on every
+    # render; a changed file gets a new mtime or size, and so a new key.
+    path = Path(path).resolve()
+    st = path.stat()
+    raw = f"{path}/{st.st_mtime_ns}/{st.st_size}/{max_width}/{max_height}/{dpi}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _save_format(image: Image.Image):
+    if image.format in ("JPEG", "MPO"):
+        return "JPEG", ".jpg"
+    return "PNG", ".png"
+
+
+def prepare_image(
+    path: Union[str, Path],
+    max_width: Optional[float] = None,
+    max_height: Optional[float] = None,
+    dpi: int = DEFAULT_DPI,
+    cache: Optional[ImageCache] = None,
+) -> Path:
+    """Return an orientation-corrected copy of `path` sized for the report.
+
+    `max_width` and `max_height` are in inches and follow the same rule as
+    `build_docx_image`: landscape images are bound by width, others by height.
+    Images larger than that size at `dpi` are downscaled. Derivatives are
+    cached by the source's path, mtime and size and the sizing parameters, so
+    repeat renders of an unchanged photo reuse the cached file. The source is never
+    modified.
+    """
+    cache = cache if cache is not None else ImageCache()
+    key = image_key(path, max_width, max_height, dpi)
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    with Image.open(path) as source:
+        fmt, suffix = _save_format(source)
+        image = ImageOps.exif_transpose(source)
+
+    w, h = image.size
+    scale = 1.0
+    if max_width and w > h:
+        scale = max_width * dpi / w
+    elif max_height:
+        scale = max_height * dpi / h
+    if scale < 1:
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        image = image.resize(size, Image.LANCZOS)
+
+    if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    cached = cache.object_path(key, suffix)
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    tmp = temp_path(cached)
+    options = {"quality": 90} if fmt == "JPEG" else {}
+    image.save(tmp, format=fmt, dpi=(dpi, dpi), **options)
+    tmp.replace(cached)
+
+    cache.added()
+    return cached
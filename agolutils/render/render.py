@@ -2,12 +2,16 @@ from pathlib import Path
 
 from docx.shared import Inches, Mm
 from docxtpl import DocxTemplate, InlineImage
+from jinja2 import Environment
 from jinja2.exceptions import TemplateSyntaxError
 from PIL import Image, ImageOps
 
+from agolutils import profiling
 from agolutils.config.config import load_config
-from agolutils.context.context import load_context
-from agolutils.utils import get_plugin, make_path
+from agolutils.context.context import expand_layer_properties, load_context
+from agolutils.utils import JINJA_FILTERS, get_plugin, make_path
+
+from .images import DEFAULT_DPI, image_cache, prepare_image, to_inches
 
 UNITS = {
     "inches": Inches,
@@ -26,11 +30,25 @@ def render_docx_template(
     report_file=None,
     report_file_pattern=None,
 ) -> Path:
+    with profiling.span("render_docx"):
+        output = _render_docx_template(
+            context, config, template, report_file, report_file_pattern
+        )
+    profiling.count("reports_rendered")
+    return output
+
+
+def _render_docx_template(context, config, template, report_file, report_file_pattern):
     config = load_config(config)
-    context = load_context(context)
+    with profiling.span("load_context"):
+        context = load_context(context)
+    # plugins and templates read `__layer_properties` from each record, so
+    # undo `share_layer_properties` first; it's a no-op for inline contexts.
+    context = expand_layer_properties(context)
 
     plugin = get_plugin(config)
-    context, config = plugin(context, config)
+    with profiling.span("plugin"):
+        context, config = plugin(context, config)
 
     _config_report_pattern = config.get("report_file_pattern")
     if report_file_pattern is None and _config_report_pattern:
@@ -43,14 +61,16 @@ def render_docx_template(
         template = Path(config["__config_relpath"]) / _config_template
 
     doc = DocxTemplate(template)
-    context = parse_docx_images(doc, config, context)
+    with profiling.span("image_prep"):
+        context = parse_docx_images(doc, config, context)
     output = make_path(report_file)
 
-    jinja_env = context.pop("_jinja_env", None)
+    jinja_env = add_filters(context.pop("_jinja_env", None) or Environment())
     autoescape = context.pop("_autoescape", False)
 
     try:
-        doc.render(context, jinja_env=jinja_env, autoescape=autoescape)
+        with profiling.span("jinja_render"):
+            doc.render(context, jinja_env=jinja_env, autoescape=autoescape)
 
     except TemplateSyntaxError as e:
         line = str(e.source).splitlines()[e.lineno - 1]
@@ -59,12 +79,29 @@ def render_docx_template(
             f"line no.: {e.lineno - 1}\n\tsource: {line}"
         ) from e
 
-    doc.save(output)
+    with profiling.span("docx_save"):
+        doc.save(output)
 
     return output
 
 
-def build_docx_image(template, info, context):
+def add_filters(jinja_env: Environment) -> Environment:
+    """Make agolutils' filters (e.g. `format_date`) available to templates,
+    without replacing any of the same name already on `jinja_env`.
+    """
+    for name, fxn in JINJA_FILTERS.items():
+        jinja_env.filters.setdefault(name, fxn)
+    return jinja_env
+
+
+def build_docx_image(template, info, context, cache=None):
+    """Attach a `docxtpl_image` InlineImage to each image dict at `info["key"]`.
+
+    With an `ImageCache` as `cache`, each photo is replaced by an
+    orientation-corrected and downscaled derivative from `prepare_image` (at
+    `info["dpi"]`, default 200).
+    Without one, the photo is orientation-corrected by rewriting it in place.
+    """
     key = info.get("key")
     if not key or key not in context:
         return context
@@ -84,17 +121,28 @@ def build_docx_image(template, info, context):
     units = UNITS.get(unit_key, Inches)
     max_w = info.get("max-width", None)
     max_h = info.get("max-height", None)
+    dpi = info.get("dpi", DEFAULT_DPI)
 
     for image_dict in images:
         path = context["__context_relpath"] / Path(image_dict[filepath_key])
         width = None
         height = None
 
-        with ImageOps.exif_transpose(Image.open(path)) as image:
-            # gotta get the actual size of the image to know how to constrain it.
-
+        if cache is not None:
+            path = prepare_image(
+                path,
+                max_width=to_inches(max_w, unit_key),
+                max_height=to_inches(max_h, unit_key),
+                dpi=dpi,
+                cache=cache,
+            )
+            image = Image.open(path)
+        else:
+            image = ImageOps.exif_transpose(Image.open(path))
             image.save(path)
 
+        with image:
+            # gotta get the actual size of the image to know how to constrain it.
             w, h = image.size
 
             if max_w and w > h:
@@ -111,9 +159,10 @@ def build_docx_image(template, info, context):
 
 def parse_docx_images(template, config, context):
     docx_photo_info = config.get("docxtpl", {}).get("image", [])
+    cache = image_cache(config)
 
     for info in docx_photo_info:
-        context = build_docx_image(template, info, context)
+        context = build_docx_image(template, info, context, cache=cache)
 
     return context
 
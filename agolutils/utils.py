@@ -1,6 +1,10 @@
 import datetime
+import functools
 import importlib.machinery
 import importlib.util
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from pytz import timezone
@@ -10,43 +14,139 @@ def null_plugin(context, cfg):
     return context, cfg
 
 
-def get_plugin(config):
-    plugin = config.get("plugin")
+class PluginRegistry:
+    """Loads plugins once and reuses them until their source changes.
 
-    if not plugin:
-        return null_plugin
+    Plugin files are cached by resolved path and mtime, so a render in a batch
+    or long-running process doesn't re-execute the plugin module. Module name
+    lookups (including ones that aren't found) are cached too.
+
+    A plugin may define `setup(config)`, which is called once when the plugin is
+    first loaded or reloaded after a change; i.e., once per batch (or per worker
+    process) rather than once per report. `clear` forgets every loaded plugin so
+    the next batch starts fresh.
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._modules = {}
+        self._lock = threading.RLock()
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._modules.clear()
 
-    _localpath = config["__config_relpath"] / (plugin + ".py")
+    def _load_file(self, plugin, path, config):
+        key = path.resolve()
+        mtime = path.stat().st_mtime_ns
 
-    if _localpath.is_file():
-        loader = importlib.machinery.SourceFileLoader(plugin, str(_localpath))
+        cached = self._files.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        loader = importlib.machinery.SourceFileLoader(plugin, str(path))
         spec = importlib.util.spec_from_loader(plugin, loader)
-        if spec is not None:
-            mod = importlib.util.module_from_spec(spec)
-            loader.exec_module(mod)
-            return mod.main
+        if spec is None:
+            return None
+        mod = importlib.util.module_from_spec(spec)
+        loader.exec_module(mod)
+        self._setup(mod, config)
+
+        self._files[key] = (mtime, mod)
+        return mod
+
+    def _import(self, name, config):
+        if name in self._modules:
+            return self._modules[name]
+
+        try:
+            mod = importlib.import_module(name)
+        except ModuleNotFoundError:
+            mod = None
+        else:
+            self._setup(mod, config)
+
+        self._modules[name] = mod
+        return mod
 
-    try:
-        mod = importlib.import_module(plugin)
-        return mod.main
-    except ModuleNotFoundError:
-        pass
+    @staticmethod
+    def _setup(mod, config):
+        setup = getattr(mod, "setup", None)
+        if callable(setup):
+            setup(config)
 
-    try:
-        mod = importlib.import_module("agolutils.plugins" + "." + plugin)
-        return mod.main
-    except ModuleNotFoundError:
-        pass
+    def get(self, config):
+        plugin = config.get("plugin")
 
-    return null_plugin
+        if not plugin:
+            return null_plugin
 
+        with self._lock:
+            _localpath = config["__config_relpath"] / (plugin + ".py")
+
+            if _localpath.is_file():
+                mod = self._load_file(plugin, _localpath, config)
+                if mod is not None:
+                    return mod.main
+
+            for name in (plugin, "agolutils.plugins" + "." + plugin):
+                mod = self._import(name, config)
+                if mod is not None:
+                    return mod.main
+
+        return null_plugin
+
+
+plugins = PluginRegistry()
+
+
+def get_plugin(config):
+    return plugins.get(config)
+
+
+def chunked(items, size):
+    """Yield successive lists of at most `size` items."""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def imap_bounded(fxn, items, max_workers=1):
+    """Like `map`, but runs `fxn` on a thread pool with at most `max_workers`
+    calls in flight, yielding results in order as they complete.
+    """
+    if max_workers <= 1:
+        yield from map(fxn, items)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(fxn, item))
+            if len(pending) >= max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def collect_files(filepaths, recursive=False, suffixes=None):
+    """Files given directly, plus those in the given directories (and, with
+    `recursive`, their subdirectories) whose names end with one of `suffixes`.
+    """
+
+    def wanted(p):
+        return suffixes is None or p.name.endswith(tuple(suffixes))
 
-def collect_files(filepaths):
     collected_files = []
     for file in filepaths:
         path = Path(file)
-        if path.is_dir():
-            collected_files.extend([str(p) for p in path.glob("*")])
+        if path.is_dir() and recursive:
+            collected_files.extend(
+                sorted(str(p) for p in path.rglob("*") if p.is_file() and wanted(p))
+            )
+        elif path.is_dir():
+            collected_files.extend([str(p) for p in path.glob("*") if wanted(p)])
         elif path.is_file():
             collected_files.append(str(path))
         else:
@@ -86,6 +186,20 @@ PRESETS = {
 }
 
 
+@functools.lru_cache(maxsize=None)
+def get_timezone(tz_string=None):
+    """The pytz timezone for `tz_string` (default UTC), built once per name."""
+    return timezone(tz_string or "UTC")
+
+
+def _to_seconds(timestamp):
+    # if the ts is passed in ms, then it'll be bigger than 1e12.
+    # if it's passed as seconds, then it won't be bigger than 1e10 until year ~2200
+    if timestamp > 1e10:
+        return timestamp / 1000
+    return timestamp
+
+
 def format_date(timestamp, tz_string=None, fmt=None):
     """
     format AGOL timestamps in a variety of useful string formats
@@ -95,28 +209,81 @@ def format_date(timestamp, tz_string=None, fmt=None):
         datetime.strftime(fmt)
     """
 
-    if tz_string is None:
-        tz_string = "UTC"
-
-    # if the ts is passed in ms, then it'll be bigger than 1e12.
-    # if it's passed as seconds, then it won't be bigger than 1e10 until year ~2200
-    if timestamp > 1e10:
-        timestamp = timestamp / 1000
-
-    utc_dt = datetime.datetime.fromtimestamp(timestamp, tz=timezone("UTC"))
+    utc_dt = datetime.datetime.fromtimestamp(
+        _to_seconds(timestamp), tz=get_timezone("UTC")
+    )
 
-    if fmt in PRESETS:
-        return utc_dt.astimezone(timezone(tz_string)).strftime(
-            PRESETS[fmt]  # type: ignore
+    if fmt is not None:
+        return utc_dt.astimezone(get_timezone(tz_string)).strftime(
+            PRESETS.get(fmt, fmt)
         )
 
-    elif fmt is not None:
-        return utc_dt.astimezone(timezone(tz_string)).strftime(fmt)
-
     else:
         return utc_dt
 
 
+def format_dates(timestamps, tz_string=None, fmt=None):
+    """`format_date` for a whole list or pandas Series of AGOL timestamps.
+
+    The timezone and format are resolved once for the batch rather than per
+    timestamp. Nulls stay None instead of raising. Returns a list, or a Series
+    for a Series (of UTC datetimes, converted by pandas, when there's no `fmt`).
+    """
+    if type(timestamps).__module__.startswith("pandas"):
+        return _format_series(timestamps, tz_string, fmt)
+
+    # like `format_date`, datetimes are returned in UTC when there's no `fmt`.
+    tz = get_timezone(tz_string if fmt is not None else "UTC")
+    fmt = PRESETS.get(fmt, fmt)
+    fromtimestamp = datetime.datetime.fromtimestamp
+
+    # repeated timestamps (e.g. date-only fields) are only formatted once.
+    seen = {}
+    formatted = []
+    for ts in timestamps:
+        if ts is None or ts != ts:
+            formatted.append(None)
+            continue
+        value = seen.get(ts)
+        if value is None:
+            value = fromtimestamp(_to_seconds(ts), tz=tz)
+            if fmt is not None:
+                value = value.strftime(fmt)
+            seen[ts] = value
+        formatted.append(value)
+    return formatted
+
+
+def _format_series(series, tz_string=None, fmt=None):
+    import pandas
+
+    if fmt is not None:
+        # pandas' strftime works element by element and is slower than ours.
+        values = format_dates(series.tolist(), tz_string=tz_string, fmt=fmt)
+        return pandas.Series(values, index=series.index, name=series.name)
+
+    series = pandas.to_numeric(series)
+    millis = series.where(series > 1e10, series * 1000)
+    return pandas.to_datetime(millis, unit="ms", utc=True)
+
+
+def date_filter(value, tz_string=None, fmt=None):
+    """Jinja filter for AGOL timestamps, taking `format_date`'s arguments in the
+    same order, e.g. `{{ EditDate | format_date('US/Eastern', 'date') }}`.
+
+    Formats a single timestamp or, for a list, every timestamp in it, using the
+    same cached timezones as `format_dates`. Empty values render as "".
+    """
+    if isinstance(value, (list, tuple)):
+        return format_dates(value, tz_string=tz_string, fmt=fmt)
+    if value is None or value == "" or value != value:
+        return ""
+    return format_dates([value], tz_string=tz_string, fmt=fmt)[0]
+
+
+JINJA_FILTERS = {"format_date": date_filter}
+
+
 tomorrow = lambda: (  # noqa: E731
     datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(1)
 ).strftime("%Y-%m-%d")
@@ -0,0 +1,71 @@
+"""Compare scalar `format_date` calls with the batch `format_dates`.
+
+The scalar side is the previous `format_date`, which built its pytz timezones
+on every call.
+
+$ python benchmarks/bench_dates.py --timestamps 20000 --tz US/Pacific
+$ python benchmarks/bench_dates.py --fmt date --distinct 365
+"""
+
+import argparse
+import datetime
+import random
+import time
+
+import pandas
+from pytz import timezone
+
+from agolutils.utils import PRESETS, format_date, format_dates
+
+
+def legacy_format_date(timestamp, tz_string="UTC", fmt=None):
+    if timestamp > 1e10:
+        timestamp = timestamp / 1000
+    utc_dt = datetime.datetime.fromtimestamp(timestamp, tz=timezone("UTC"))
+    return utc_dt.astimezone(timezone(tz_string)).strftime(PRESETS.get(fmt, fmt))
+
+
+def timeit(fxn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fxn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--timestamps", type=int, default=20000)
+    parser.add_argument("--tz", default="US/Pacific")
+    parser.add_argument("--fmt", default="date_time")
+    parser.add_argument(
+        "--distinct", type=int, default=None, help="distinct timestamps, e.g. dates"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pool = [
+        random.randint(1_600_000_000_000, 1_800_000_000_000)
+        for _ in range(args.distinct or args.timestamps)
+    ]
+    ts = [random.choice(pool) for _ in range(args.timestamps)]
+    series = pandas.Series(ts)
+    tz, fmt = args.tz, args.fmt
+
+    results = {
+        "legacy": timeit(
+            lambda: [legacy_format_date(t, tz, fmt) for t in ts], args.repeat
+        ),
+        "scalar": timeit(lambda: [format_date(t, tz, fmt) for t in ts], args.repeat),
+        "list": timeit(lambda: format_dates(ts, tz, fmt), args.repeat),
+        "series": timeit(lambda: format_dates(series, tz, fmt), args.repeat),
+    }
+
+    for name, seconds in results.items():
+        rate = args.timestamps / seconds
+        print(f"{name:>8}: {seconds * 1000:8.1f} ms  ({rate:,.0f} timestamps/s)")
+
+
+if __name__ == "__main__":
+    main()
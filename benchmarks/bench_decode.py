@@ -0,0 +1,94 @@
+"""Compare the schema-driven record decoder with the pandas round trip.
+
+The pandas side builds a plain DataFrame in place of `FeatureSet.sdf`, which
+also builds the spatial accessor, so it understates the real pandas cost.
+
+$ python benchmarks/bench_decode.py --records 5000
+"""
+
+import argparse
+import json
+import random
+import time
+from types import SimpleNamespace
+
+import pandas
+
+from agolutils.arcgis.decode import FieldDecoder
+
+FIELDS = [
+    {"name": "objectid", "type": "esriFieldTypeOID"},
+    {"name": "globalid", "type": "esriFieldTypeGlobalID"},
+    {"name": "site_name", "type": "esriFieldTypeString"},
+    {"name": "score", "type": "esriFieldTypeDouble"},
+    {"name": "count", "type": "esriFieldTypeInteger"},
+    {"name": "inspected", "type": "esriFieldTypeDate"},
+    {"name": "CreationDate", "type": "esriFieldTypeDate"},
+    {"name": "EditDate", "type": "esriFieldTypeDate"},
+]
+
+
+def make_features(n):
+    now = 1_700_000_000_000
+    return [
+        SimpleNamespace(
+            attributes={
+                "objectid": i,
+                "globalid": f"{{{i:08d}-0000-0000-0000-000000000000}}",
+                "site_name": f"site {i}",
+                "score": random.random() * 100,
+                "count": random.choice([None, random.randint(0, 50)]),
+                "inspected": now + i * 1000,
+                "CreationDate": now,
+                "EditDate": now + i,
+            }
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def pandas_records(features):
+    # stands in for `FeatureSet.sdf`, which parses date fields into datetimes.
+    df = pandas.DataFrame.from_records([f.attributes for f in features])
+    for f in FIELDS:
+        if f["type"] == "esriFieldTypeDate":
+            df[f["name"]] = pandas.to_datetime(df[f["name"]], unit="ms")
+
+    for col in df.select_dtypes(include=["datetime64"]).columns:
+        df[col] = df[col].astype("datetime64[ns]")
+    return json.loads(df.to_json(orient="records", date_unit="ms"))
+
+
+def fields_records(features):
+    return FieldDecoder(FIELDS).decode_features(features)
+
+
+def timeit(fxn, features, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fxn(features)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    features = make_features(args.records)
+    results = {
+        "pandas": timeit(pandas_records, features, args.repeat),
+        "fields": timeit(fields_records, features, args.repeat),
+    }
+
+    for name, seconds in results.items():
+        rate = args.records / seconds
+        print(f"{name:>8}: {seconds * 1000:8.1f} ms  ({rate:,.0f} records/s)")
+    print(f" speedup: {results['pandas'] / results['fields']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare per-record domain remapping with the cached `DomainIndex`.
+
+The legacy side is the previous `remap_domains_as_name`, which rebuilt every
+`{code: name}` mapping for each record. `per_record` looks the index up for
+each record, as `remap_domains_as_name` does now, and `indexed` once per batch.
+
+$ python benchmarks/bench_domains.py --records 5000 --fields 20
+"""
+
+import argparse
+import random
+import time
+
+from agolutils.arcgis.domains import domain_filter, domain_index
+
+
+def make_properties(n_fields, n_codes):
+    fields = [{"name": "objectid", "type": "esriFieldTypeOID"}]
+    for i in range(n_fields):
+        codes = [{"code": f"c{j}", "name": f"Choice {j}"} for j in range(n_codes)]
+        fields.append(
+            {
+                "name": f"choice_{i}",
+                "type": "esriFieldTypeString",
+                "domain": {"type": "codedValue", "codedValues": codes},
+            }
+        )
+    return {"id": 0, "serviceItemId": "bench", "name": "bench", "fields": fields}
+
+
+def make_records(n, props, n_codes):
+    names = [f["name"] for f in props["fields"][1:]]
+    return [
+        {
+            "objectid": i,
+            "__layer_properties": props,
+            **{name: f"c{random.randrange(n_codes + 1)}" for name in names},
+        }
+        for i in range(n)
+    ]
+
+
+def legacy(records):
+    for context in records:
+        fields = context.get("__layer_properties", {}).get("fields", [])
+        for field in filter(domain_filter, fields):
+            name = field["name"]
+            mapping = {d["code"]: d["name"] for d in field["domain"]["codedValues"]}
+            context[name + "__as_name"] = mapping.get(context.get(name), "None")
+
+
+def per_record(records):
+    for context in records:
+        domain_index(context["__layer_properties"]).apply(context)
+
+
+def indexed(records):
+    domain_index(records[0]["__layer_properties"]).apply_records(records)
+
+
+def timeit(fxn, records, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fxn(records)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--fields", type=int, default=20)
+    parser.add_argument("--codes", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    props = make_properties(args.fields, args.codes)
+    records = make_records(args.records, props, args.codes)
+    results = {
+        "legacy": timeit(legacy, records, args.repeat),
+        "per_record": timeit(per_record, records, args.repeat),
+        "indexed": timeit(indexed, records, args.repeat),
+    }
+
+    for name, seconds in results.items():
+        rate = args.records / seconds
+        print(f"{name:>10}: {seconds * 1000:8.1f} ms  ({rate:,.0f} records/s)")
+    for name in ["per_record", "indexed"]:
+        speedup = results["legacy"] / results[name]
+        print(f"{name:>10}: {speedup:.1f}x faster than legacy")
+
+
+if __name__ == "__main__":
+    main()
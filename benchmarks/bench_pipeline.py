@@ -0,0 +1,213 @@
+"""Fetch contexts from a fake Survey123 service and render them, end to end.
+
+Runs `Survey123Service.write_contexts` against the in-process fake from
+`fake_agol.py` (no ArcGIS Online connection needed), then renders every context
+with `render_docx_template`. It reports throughput, requests made, stage
+timings (see `agolutils.profiling`) and peak memory. Pass `--json` to save the
+results, and `--compare` with a saved run to exit non-zero if throughput,
+requests or peak memory got worse by more than `--tolerance`.
+
+$ python benchmarks/bench_pipeline.py --records 200 --repeats 5 --latency-ms 20
+$ python benchmarks/bench_pipeline.py --download-workers 8 --relates-batch-size 50
+$ python benchmarks/bench_pipeline.py --json baseline.json
+$ python benchmarks/bench_pipeline.py --compare baseline.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from docx import Document
+
+from agolutils import profiling
+from agolutils.arcgis.survey123 import Survey123Service
+from agolutils.render.render import render_docx_template
+
+sys.path.insert(0, str(Path(__file__).parent))
+from fake_agol import make_service  # noqa: E402
+
+TEMPLATE_LINES = [
+    "{{ site_name }} ({{ status }}) inspected "
+    "{{ inspected | format_date('UTC', 'date') }}",
+    "{% for r in relates.get('repeat', {}).get('data', []) %}"
+    "{{ r.note }}: {{ r.count }}; {% endfor %}",
+    "{% for a in attachments %}{{ a.docxtpl_image }}{% endfor %}",
+]
+
+
+def make_template(path: Path) -> Path:
+    doc = Document()
+    for line in TEMPLATE_LINES:
+        doc.add_paragraph(line)
+    doc.save(path)
+    return path
+
+
+def make_config(tmp: Path) -> dict:
+    return {
+        "__config_relpath": tmp,
+        "docxtpl": {
+            "template_filepath": str(make_template(tmp / "template.docx")),
+            "image_cache": str(tmp / "image-cache"),
+            "image": [
+                {
+                    "key": "attachments",
+                    "filepath_key": "attachment_filepath",
+                    "max-width": 3,
+                    "max-height": 2,
+                    "units": "inches",
+                }
+            ],
+        },
+        "report_file_pattern": "reports/{globalid}.docx",
+    }
+
+
+def parse_size(value: str):
+    w, h = value.lower().split("x")
+    return int(w), int(h)
+
+
+# (result, True if higher is better) checked by `--compare`.
+COMPARED = [
+    ("fetch_records_per_second", True),
+    ("render_reports_per_second", True),
+    ("request_total", False),
+    ("peak_memory_bytes", False),
+]
+
+# arguments that don't change what's measured.
+UNCOMPARED_ARGS = {"json", "compare", "tolerance"}
+
+
+def compare(results, baseline, tolerance):
+    """Names of the `COMPARED` results that are worse than `baseline` by more
+    than `tolerance` (a fraction), printing each comparison.
+    """
+    # through json, as the baseline was, so e.g. tuples compare as lists.
+    args = json.loads(json.dumps(results["args"], default=str))
+    base_args = {k: v for k, v in baseline["args"].items() if k not in UNCOMPARED_ARGS}
+    if args != base_args:
+        sys.exit(f"baseline was run with different arguments: {base_args}")
+
+    regressed = []
+    print(f"\ncompared with baseline (tolerance {tolerance:.0%}):")
+    for name, higher_is_better in COMPARED:
+        value, base = results.get(name), baseline.get(name)
+        if not value or not base:
+            continue
+        change = value / base - 1
+        worse = -change if higher_is_better else change
+        flag = "REGRESSED" if worse > tolerance else "ok"
+        print(f"  {name:>26}: {base:>14,} -> {value:>14,}  ({change:+.1%}) {flag}")
+        if worse > tolerance:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--photos", type=int, default=2)
+    parser.add_argument("--repeat-photos", type=int, default=0)
+    parser.add_argument("--photo-size", type=parse_size, default=(1600, 1200))
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--download-workers", type=int, default=1)
+    parser.add_argument("--query-workers", type=int, default=1)
+    parser.add_argument("--relates-batch-size", type=int, default=None)
+    parser.add_argument("--no-render", action="store_true")
+    parser.add_argument("--json", type=Path, default=None, help="save results here")
+    parser.add_argument(
+        "--compare", type=Path, default=None, help="a --json baseline to check"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    item, stats = make_service(
+        records=args.records,
+        repeats=args.repeats,
+        photos=args.photos,
+        repeat_photos=args.repeat_photos,
+        photo_size=args.photo_size,
+        latency=args.latency_ms / 1000,
+    )
+    oids = list(range(1, args.records + 1))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        config = make_config(tmp)
+
+        with profiling.profile_run() as profiler:
+            start = time.perf_counter()
+            paths = Survey123Service(item).write_contexts(
+                oids,
+                context_file_pattern=str(tmp / "contexts/{globalid}/context.json"),
+                download_workers=args.download_workers,
+                query_workers=args.query_workers,
+                relates_batch_size=args.relates_batch_size,
+            )
+            fetch_seconds = time.perf_counter() - start
+
+            render_seconds = 0.0
+            if not args.no_render:
+                start = time.perf_counter()
+                for path in paths:
+                    render_docx_template(path, config)
+                render_seconds = time.perf_counter() - start
+
+        report = profiler.report()
+
+    results = {
+        "args": {k: v for k, v in vars(args).items() if k not in UNCOMPARED_ARGS},
+        "contexts": len(paths),
+        "fetch_seconds": round(fetch_seconds, 3),
+        "fetch_records_per_second": round(len(paths) / fetch_seconds, 2),
+        "render_seconds": round(render_seconds, 3),
+        "render_reports_per_second": (
+            round(len(paths) / render_seconds, 2) if render_seconds else None
+        ),
+        "requests": dict(stats.requests),
+        "request_total": stats.total,
+        "bytes_served": stats.bytes_served,
+        "peak_memory_bytes": report["peak_memory_bytes"],
+        "stages": report["stages"],
+    }
+
+    print(f"contexts: {results['contexts']}")
+    print(
+        f"   fetch: {fetch_seconds:8.2f} s  "
+        f"({results['fetch_records_per_second']:,.1f} records/s)"
+    )
+    if render_seconds:
+        print(
+            f"  render: {render_seconds:8.2f} s  "
+            f"({results['render_reports_per_second']:,.1f} reports/s)"
+        )
+    print(
+        f"requests: {stats.total}  "
+        + ", ".join(f"{k}={v}" for k, v in stats.requests.items())
+    )
+    print(f"  served: {stats.bytes_served / 1024 / 1024:.1f} MB")
+    if report["peak_memory_bytes"]:
+        print(f"peak rss: {report['peak_memory_bytes'] / 1024 / 1024:.1f} MB")
+    print("  stages:")
+    for name, stage in report["stages"].items():
+        print(f"    {name:>20}: {stage['seconds']:8.3f} s  {stage['calls']:>6} calls")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, default=str))
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressed = compare(results, baseline, args.tolerance)
+        if regressed:
+            print(f"\nregressed: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
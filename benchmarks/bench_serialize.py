@@ -0,0 +1,85 @@
+"""Compare context file size and write/read speed across serializer options.
+
+$ python benchmarks/bench_serialize.py --records 500
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from agolutils.io import json_backends, load_json, write_json, zstandard
+
+FIELDS = [
+    {
+        "name": f"field_{i}",
+        "type": "esriFieldTypeString",
+        "alias": f"Field {i}",
+        "domain": {
+            "type": "codedValue",
+            "codedValues": [{"code": f"c{j}", "name": f"Choice {j}"} for j in range(8)],
+        },
+    }
+    for i in range(30)
+]
+
+
+def make_context(n):
+    props = {"id": 1, "name": "repeat", "fields": FIELDS}
+    data = [
+        {
+            "objectid": i,
+            "globalid": f"{{{i:08d}-0000-0000-0000-000000000000}}",
+            "EditDate": 1_700_000_000_000 + i,
+            **{f["name"]: f"c{i % 8}" for f in FIELDS},
+            "__layer_properties": props,
+        }
+        for i in range(n)
+    ]
+    return {
+        "objectid": 1,
+        "relates": {"repeat": {"name": "repeat", "data": data}},
+        "__layer_properties": props,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=500)
+    args = parser.parse_args()
+
+    context = make_context(args.records)
+    compressions = [None, "gzip"] + (["zstd"] if zstandard is not None else [])
+
+    print(
+        f"{'backend':>8} {'compact':>8} {'compress':>8} {'size KB':>9} "
+        f"{'write ms':>9} {'read ms':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in json_backends():
+            for compact in (False, True):
+                for compression in compressions:
+                    start = time.perf_counter()
+                    path = write_json(
+                        context,
+                        Path(tmp) / "context.json",
+                        compact=compact,
+                        compression=compression,
+                        backend=backend,
+                    )
+                    write = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    load_json(path)
+                    read = time.perf_counter() - start
+
+                    print(
+                        f"{backend:>8} {str(compact):>8} {str(compression):>8} "
+                        f"{path.stat().st_size / 1024:9.0f} {write * 1000:9.1f} "
+                        f"{read * 1000:8.1f}"
+                    )
+                    path.unlink()
+
+
+if __name__ == "__main__":
+    main()
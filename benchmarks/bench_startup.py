@@ -0,0 +1,133 @@
+"""Time cli startup: quick commands, which schedulers call over and over, and
+`agolutils <command> --help`.
+
+Each command runs in a fresh interpreter, so this is the import cost a user
+pays on every invocation. Also lists the slowest imports, from
+`python -X importtime`. Exits non-zero if a quick command's median is over
+`--budget-ms` (200 ms by default) or if `import agolutils.cli` pulls in any of
+`HEAVY_MODULES`, so heavy imports can't creep back in. `--help` is reported but
+not budgeted, since typer only loads rich to render help.
+
+$ python benchmarks/bench_startup.py
+$ python benchmarks/bench_startup.py --budget-ms 250 --top 20
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+QUICK_COMMANDS = [
+    ["config"],
+    ["search", "no-such-file-*"],
+    ["cache", "info", "--path", "{tmp}"],
+]
+
+HELP_COMMANDS = [
+    [],
+    ["render-docx"],
+    ["render-batch"],
+    ["config"],
+    ["search"],
+    ["context"],
+    ["cache"],
+]
+
+# only the commands that need these should import them.
+HEAVY_MODULES = [
+    "arcgis",
+    "pandas",
+    "docxtpl",
+    "docx",
+    "PIL",
+    "jinja2",
+    "yaml",
+    "dotenv",
+    "cProfile",
+    "tracemalloc",
+]
+
+
+def timeit_cmd(cmd):
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def run_cli(args):
+    return timeit_cmd([sys.executable, "-m", "agolutils.cli", *args])
+
+
+def heavy_imports():
+    """The `HEAVY_MODULES` that `import agolutils.cli` loads."""
+    code = (
+        "import sys, agolutils.cli; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    cmd = [sys.executable, "-c", code]
+    return subprocess.run(
+        cmd, check=True, capture_output=True, text=True
+    ).stdout.split()
+
+
+def slowest_imports(top):
+    """The `top` modules with the largest cumulative import time, in ms."""
+    cmd = [sys.executable, "-X", "importtime", "-c", "import agolutils.cli"]
+    stderr = subprocess.run(cmd, check=True, capture_output=True, text=True).stderr
+
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=200.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # a bare interpreter, to separate python's own startup from ours.
+    baseline = statistics.median(
+        timeit_cmd([sys.executable, "-c", "pass"]) for _ in range(args.repeat)
+    )
+    print(f"{'python':>22}: {baseline * 1000:8.1f} ms")
+
+    over = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for command in QUICK_COMMANDS:
+            command = [c.format(tmp=tmp) for c in command]
+            seconds = statistics.median(run_cli(command) for _ in range(args.repeat))
+            name = " ".join(command[:2])
+            print(f"{name:>22}: {seconds * 1000:8.1f} ms")
+            if seconds * 1000 > args.budget_ms:
+                over.append(name)
+
+    for command in HELP_COMMANDS:
+        seconds = statistics.median(
+            run_cli([*command, "--help"]) for _ in range(args.repeat)
+        )
+        name = " ".join([*command, "--help"])
+        print(f"{name:>22}: {seconds * 1000:8.1f} ms")
+
+    print("\nslowest imports of agolutils.cli (cumulative):")
+    for ms, name in slowest_imports(args.top):
+        print(f"  {ms:8.1f} ms  {name}")
+
+    heavy = heavy_imports()
+    if heavy:
+        print(f"\nimport agolutils.cli loads: {', '.join(heavy)}")
+    if over:
+        print(f"\nover the {args.budget_ms:g} ms budget: {', '.join(over)}")
+    if heavy or over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""An in-process stand-in for a Survey123 feature service, for benchmarks.
+
+`make_service` builds a fake `Item` whose parent layer and repeat table answer
+the calls agolutils makes (`query`, `query_related_records`,
+`attachments.get_list` and `attachments.download`) from generated data. Each
+call sleeps for `latency` seconds to mimic the round trip and is tallied in
+`RequestStats`, so runs can be compared without an ArcGIS Online connection.
+"""
+
+import io
+import random
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+EPOCH_MS = 1_700_000_000_000
+STATUS_CODES = [{"code": f"s{i}", "name": f"Status {i}"} for i in range(6)]
+
+PARENT_FIELDS = [
+    {"name": "objectid", "type": "esriFieldTypeOID"},
+    {"name": "globalid", "type": "esriFieldTypeGlobalID"},
+    {"name": "site_name", "type": "esriFieldTypeString"},
+    {"name": "score", "type": "esriFieldTypeDouble"},
+    {
+        "name": "status",
+        "type": "esriFieldTypeString",
+        "domain": {"type": "codedValue", "codedValues": STATUS_CODES},
+    },
+    {"name": "inspected", "type": "esriFieldTypeDate"},
+    {"name": "EditDate", "type": "esriFieldTypeDate"},
+]
+
+REPEAT_FIELDS = [
+    {"name": "objectid", "type": "esriFieldTypeOID"},
+    {"name": "globalid", "type": "esriFieldTypeGlobalID"},
+    {"name": "parentglobalid", "type": "esriFieldTypeGUID"},
+    {"name": "note", "type": "esriFieldTypeString"},
+    {"name": "count", "type": "esriFieldTypeInteger"},
+    {"name": "EditDate", "type": "esriFieldTypeDate"},
+]
+
+
+class PropertyMap(dict):
+    """A dict with attribute access, like `arcgis`' PropertyMap."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+
+class RequestStats:
+    def __init__(self):
+        self.requests: Counter = Counter()
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, nbytes: int = 0):
+        with self._lock:
+            self.requests[kind] += 1
+            self.bytes_served += nbytes
+
+    @property
+    def total(self) -> int:
+        return sum(self.requests.values())
+
+
+def make_photo(size: Tuple[int, int], seed: int = 0) -> bytes:
+    """A JPEG of noise, which compresses about as badly as a real photo."""
+    rng = random.Random(seed)
+    w, h = size
+    tile = Image.frombytes("RGB", (64, 64), rng.randbytes(64 * 64 * 3))
+    image = Image.new("RGB", size)
+    for x in range(0, w, 64):
+        for y in range(0, h, 64):
+            image.paste(tile.rotate(rng.choice([0, 90, 180, 270])), (x, y))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+class FakeAttachments:
+    def __init__(self, layer: "FakeLayer", photos: Dict[int, int], photo: bytes):
+        self.layer = layer
+        self.photos = photos
+        self.photo = photo
+
+        # attachment ids are unique across the layer, as on a real service.
+        self.ids: Dict[int, List[int]] = {}
+        next_id = 1
+        for oid in sorted(photos):
+            self.ids[oid] = list(range(next_id, next_id + photos[oid]))
+            next_id += photos[oid]
+
+    def _list(self, oid: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": attachment_id,
+                "name": f"photo-{oid}-{i + 1}.jpg",
+                "size": len(self.photo),
+                "contentType": "image/jpeg",
+                "keywords": "photo",
+            }
+            for i, attachment_id in enumerate(self.ids.get(oid, []))
+        ]
+
+    def get_list(self, oid: int) -> List[Dict[str, Any]]:
+        self.layer._request("attachments.get_list")
+        return self._list(oid)
+
+    def download(self, oid: int, attachment_id: int, save_path: str) -> List[str]:
+        self.layer._request("attachments.download", len(self.photo))
+        att = next(a for a in self._list(oid) if a["id"] == attachment_id)
+        path = Path(save_path) / att["name"]
+        path.write_bytes(self.photo)
+        return [str(path)]
+
+
+class FakeLayer:
+    def __init__(
+        self,
+        properties: Dict[str, Any],
+        records: Dict[int, Dict[str, Any]],
+        url: str,
+        stats: RequestStats,
+        latency: float = 0.0,
+        related: Optional[Dict[int, Dict[int, List[int]]]] = None,
+        photos: Optional[Dict[int, int]] = None,
+        photo: bytes = b"",
+    ):
+        self.properties = PropertyMap(properties)
+        self.records = records
+        self.url = url
+        self.stats = stats
+        self.latency = latency
+        self.related = related or {}
+        self.attachments = FakeAttachments(self, photos or {}, photo)
+
+    def _request(self, kind: str, nbytes: int = 0):
+        self.stats.record(kind, nbytes)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def query(self, where=None, object_ids=None, return_ids_only=False, **kwargs):
+        self._request("query")
+        if object_ids is not None:
+            oids = [int(o) for o in str(object_ids).split(",") if o]
+        else:
+            oids = list(self.records)
+        oids = [o for o in oids if o in self.records]
+
+        if return_ids_only:
+            return {"objectIdFieldName": "objectid", "objectIds": oids}
+        features = [SimpleNamespace(attributes=dict(self.records[o])) for o in oids]
+        return SimpleNamespace(features=features)
+
+    def query_related_records(
+        self, object_ids, relationship_id, definition_expression=None, **kwargs
+    ):
+        """Related object ids, at most `maxRecordCount` of them per response
+        like the real service. `definition_expression` may be `objectid > N`.
+        """
+        self._request("query_related_records")
+        related = self.related.get(int(relationship_id), {})
+        after = int(definition_expression.split(">")[1]) if definition_expression else 0
+
+        budget = self.properties["maxRecordCount"]
+        groups, exceeded = [], False
+        for oid in (int(o) for o in str(object_ids).split(",")):
+            children = [c for c in related.get(oid, []) if c > after]
+            if len(children) > budget:
+                children, exceeded = children[:budget], True
+            budget -= len(children)
+            if children:
+                records = [{"attributes": {"objectid": c}} for c in children]
+                groups.append({"objectId": oid, "relatedRecords": records})
+        response = {"relatedRecordGroups": groups}
+        if exceeded:
+            response["exceededTransferLimit"] = True
+        return response
+
+
+def make_service(
+    records: int = 100,
+    repeats: int = 3,
+    photos: int = 2,
+    repeat_photos: int = 0,
+    photo_size: Tuple[int, int] = (1600, 1200),
+    latency: float = 0.0,
+    max_record_count: int = 1000,
+    seed: int = 0,
+) -> Tuple[SimpleNamespace, RequestStats]:
+    """A fake Survey123 service item and the stats its requests are tallied in.
+
+    Each of the `records` parent records has `repeats` related records and
+    `photos` attachments; each related record has `repeat_photos`.
+    """
+    rng = random.Random(seed)
+    stats = RequestStats()
+    photo = make_photo(photo_size, seed=seed)
+    url = "https://services.example.com/arcgis/rest/services/survey/FeatureServer"
+
+    parents, children, related = {}, {}, {}
+    child_oid = 0
+    for oid in range(1, records + 1):
+        globalid = f"{{{oid:08d}-0000-4000-8000-000000000000}}"
+        parents[oid] = {
+            "objectid": oid,
+            "globalid": globalid,
+            "site_name": f"Site {oid}",
+            "score": rng.random() * 100,
+            "status": rng.choice(STATUS_CODES)["code"],
+            "inspected": EPOCH_MS + oid * 60_000,
+            "EditDate": EPOCH_MS + oid * 61_000,
+        }
+        related[oid] = []
+        for _ in range(repeats):
+            child_oid += 1
+            related[oid].append(child_oid)
+            children[child_oid] = {
+                "objectid": child_oid,
+                "globalid": f"{{{child_oid:08d}-0000-4000-9000-000000000000}}",
+                "parentglobalid": globalid,
+                "note": f"observation {child_oid}",
+                "count": rng.randint(0, 20),
+                "EditDate": EPOCH_MS + child_oid * 1000,
+            }
+
+    common = {
+        "serviceItemId": "fakeservice",
+        "maxRecordCount": max_record_count,
+        "editFieldsInfo": {"editDateField": "EditDate"},
+    }
+    layer = FakeLayer(
+        {
+            **common,
+            "id": 0,
+            "name": "survey",
+            "type": "Feature Layer",
+            "hasAttachments": photos > 0,
+            "fields": PARENT_FIELDS,
+            "relationships": [{"id": 0, "relatedTableId": 1}],
+        },
+        parents,
+        url=f"{url}/0",
+        stats=stats,
+        latency=latency,
+        related={0: related},
+        photos=dict.fromkeys(parents, photos),
+        photo=photo,
+    )
+    table = FakeLayer(
+        {
+            **common,
+            "id": 1,
+            "name": "repeat",
+            "type": "Table",
+            "hasAttachments": repeat_photos > 0,
+            "fields": REPEAT_FIELDS,
+            "relationships": [],
+        },
+        children,
+        url=f"{url}/1",
+        stats=stats,
+        latency=latency,
+        photos=dict.fromkeys(children, repeat_photos),
+        photo=photo,
+    )
+
+    item = SimpleNamespace(id="fakeservice", layers=[layer], tables=[table])
+    return item, stats